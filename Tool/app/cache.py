@@ -0,0 +1,177 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, request
+
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class LocalBackend(TTLCache):
+    """In-process backend, each gunicorn worker keeps its own entries."""
+
+    def add(self, key, value, ttl=None):
+        # set unless a live value is already there, returns what is stored
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[0] >= time.monotonic():
+                return item[1]
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            return value
+
+
+class RedisBackend:
+    """Shared backend, every worker sees the same entries and invalidations."""
+
+    def __init__(self, url, ttl=60):
+        import redis
+
+        self.ttl = ttl
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+
+    def get(self, key, default=None):
+        value = self.client.get(key)
+        return default if value is None else value
+
+    def set(self, key, value, ttl=None):
+        self.client.set(key, value, ex=self.ttl if ttl is None else ttl)
+
+    def add(self, key, value, ttl=None):
+        self.client.set(key, value, ex=ttl, nx=True)
+        return self.client.get(key)
+
+    def delete(self, key):
+        self.client.delete(key)
+
+
+class Cache:
+    """Per-tenant cache of JSON read responses.
+
+    Entries are keyed by tenant, the tenant's data version (see
+    app.versions), endpoint and query string. Every write bumps the version
+    in the database, so no worker, whatever its backend, can serve an entry
+    from before the write; old entries just age out. Backend errors only
+    cost a cache miss.
+    """
+
+    def __init__(self):
+        self.backend = None
+
+    def init_app(self, app):
+        url = app.config.get("CACHE_REDIS_URL") or os.getenv("CACHE_REDIS_URL")
+        ttl = int(app.config.get("CACHE_TTL") or os.getenv("CACHE_TTL", 60))
+        if url:
+            self.backend = RedisBackend(url, ttl=ttl)
+        else:
+            self.backend = LocalBackend(maxsize=int(os.getenv("CACHE_SIZE", 2048)), ttl=ttl)
+        app.extensions["tenant_cache"] = self
+
+    @property
+    def shared(self):
+        """True when every worker reads and writes the same entries."""
+        return isinstance(self.backend, RedisBackend)
+
+    def get(self, key):
+        if self.backend is None:
+            return None
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            current_app.logger.warning(f"cache read failed: {e}")
+            return None
+
+    def set(self, key, value, ttl=None):
+        if self.backend is None:
+            return
+        try:
+            self.backend.set(key, value, ttl=ttl)
+        except Exception as e:
+            current_app.logger.warning(f"cache write failed: {e}")
+
+    def add(self, key, value, ttl=None):
+        # set unless the key is already there
+        if self.backend is None:
+            return
+        try:
+            self.backend.add(key, value, ttl=ttl)
+        except Exception as e:
+            current_app.logger.warning(f"cache write failed: {e}")
+
+    def _key(self, user_id, version, namespace):
+        params = f"{request.path}?{sorted(request.args.items(multi=True))}"
+        digest = hashlib.sha1(params.encode()).hexdigest()[:16]
+        return f"cache:{user_id}:{version}:{namespace}:{digest}"
+
+    def response(self, user_id, version, namespace):
+        """The JSON response cached for this request at data `version`, or None."""
+        if self.backend is None:
+            return None
+        try:
+            body = self.backend.get(self._key(user_id, version, namespace))
+        except Exception as e:
+            current_app.logger.warning(f"cache read failed: {e}")
+            return None
+        if body is None:
+            return None
+        return current_app.response_class(body, mimetype="application/json")
+
+    def save_response(self, user_id, version, namespace, response):
+        """Store a successful JSON response built at data `version`, returns it unchanged.
+
+        Read the version before the data: a write landing in between then
+        leaves the body newer than its key, never older.
+        """
+        if self.backend is None or response.status_code != 200:
+            return response
+        try:
+            self.backend.set(
+                self._key(user_id, version, namespace), response.get_data(as_text=True))
+        except Exception as e:
+            current_app.logger.warning(f"cache write failed: {e}")
+        return response
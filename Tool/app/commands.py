@@ -0,0 +1,364 @@
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import click
+import numpy as np
+from sqlalchemy.exc import OperationalError
+from .db import db
+from .models import (User, Product, SalesHistory, DailySalesRollup, ReorderSuggestion,
+                     TenantDataVersion, Spent, SMSHistory, SMScontacts, Services)
+from .upsert import upsert
+
+
+def hot_queries(user_id):
+    """The tenant-scoped queries the list endpoints run on every request."""
+    return {
+        "products by status": db.select(Product)
+            .where(Product.user_id == user_id, Product.status == "active"),
+        "sales history": db.select(SalesHistory, Product)
+            .join(Product)
+            .where(Product.user_id == user_id)
+            .order_by(SalesHistory.created_at.desc()),
+        "expenses": db.select(Spent)
+            .where(Spent.user_id == user_id)
+            .order_by(Spent.date.desc()),
+        "sms history": db.select(SMSHistory)
+            .where(SMSHistory.user_id == user_id)
+            .order_by(SMSHistory.created_at.desc()),
+        "sms contacts": db.select(SMScontacts)
+            .where(SMScontacts.user_id == user_id),
+        "services": db.select(Services)
+            .where(Services.user_id == user_id),
+        "reset token lookup": db.select(User)
+            .where(User.reset_token == "token"),
+    }
+
+
+def explain(statement):
+    engine = db.engine
+    sql = str(statement.compile(engine, compile_kwargs={"literal_binds": True}))
+    prefix = "EXPLAIN QUERY PLAN" if engine.dialect.name == "sqlite" else "EXPLAIN"
+
+    result = db.session.execute(db.text(f"{prefix} {sql}"))
+    return list(result.keys()), result.fetchall()
+
+
+def is_test_database(url):
+    # stress-sales writes rows, so it only runs where that can't hurt
+    return "test" in (url.database or "").lower()
+
+
+def remove_stress_tenant(user_id, product_id):
+    for model, column in ((DailySalesRollup, DailySalesRollup.product_id),
+                          (SalesHistory, SalesHistory.product_id),
+                          (Product, Product.id)):
+        db.session.execute(db.delete(model).where(column == product_id))
+    db.session.execute(db.delete(TenantDataVersion).where(TenantDataVersion.user_id == user_id))
+    db.session.execute(db.delete(User).where(User.id == user_id))
+    db.session.commit()
+
+
+def register_commands(app):
+
+    @app.cli.command("db-explain")
+    @click.option("--user-id", type=int, help="Tenant to explain the queries for.")
+    def db_explain(user_id):
+        """Print the EXPLAIN plan of every hot tenant-scoped query."""
+        if user_id is None:
+            user_id = db.session.query(db.func.min(User.id)).scalar() or 1
+
+        for name, statement in hot_queries(user_id).items():
+            columns, rows = explain(statement)
+            click.echo(f"== {name}")
+            click.echo(" | ".join(columns))
+            for row in rows:
+                click.echo(" | ".join(str(value) for value in row))
+            click.echo("")
+
+    @app.cli.command("stress-sales")
+    @click.option("--stock", default=100, help="Starting stock of the scratch product.")
+    @click.option("--sales", default=500, help="Number of sales to fire.")
+    @click.option("--workers", default=16, help="Sales running at the same time.")
+    @click.option("--quantity", default=1, help="Units per sale.")
+    def stress_sales(stock, sales, workers, quantity):
+        """Fire concurrent sales at a scratch tenant and assert nothing is oversold.
+
+        Only runs against a database whose name contains "test", and
+        removes every row it created. Exits non-zero if an invariant fails.
+        """
+        from stock_manage.ledger import record_sale
+
+        if not is_test_database(db.engine.url):
+            raise click.ClickException(
+                "stress-sales writes sales, point DATABASE_URL at a database "
+                "whose name contains 'test'")
+
+        tag = uuid.uuid4().hex[:12]
+        tenant = User(
+            firstname="stress",
+            lastname="test",
+            business_name=f"stress-test-{tag}",
+            email=f"stress-test-{tag}@example.invalid",
+            phone=f"stress-test-{tag}",
+            location="stress test",
+            password="!"
+        )
+        db.session.add(tenant)
+        db.session.flush()
+        product = Product(
+            product_name=f"stress-test-{tag}",
+            selling_price=1,
+            amount_spent=1,
+            initial_stock=stock,
+            remaining_stock=stock,
+            user_id=tenant.id
+        )
+        db.session.add(product)
+        db.session.commit()
+        tenant_id, product_id = tenant.id, product.id
+
+        def sell(_):
+            with app.app_context():
+                started = time.perf_counter()
+                try:
+                    item = db.session.get(Product, product_id)
+                    if record_sale(item, quantity):
+                        db.session.commit()
+                        outcome = "sold"
+                    else:
+                        db.session.rollback()
+                        outcome = "out of stock"
+                except OperationalError:
+                    # lock wait timeouts and deadlocks
+                    db.session.rollback()
+                    outcome = "lock error"
+                return outcome, time.perf_counter() - started
+
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(sell, range(sales)))
+            elapsed = time.perf_counter() - started
+
+            outcomes = Counter(outcome for outcome, _ in results)
+            latencies = sorted(latency for _, latency in results)
+
+            db.session.expire_all()
+            remaining = db.session.get(Product, product_id).remaining_stock
+            recorded = (
+                db.session.query(db.func.coalesce(db.func.sum(SalesHistory.quantity), 0))
+                .filter(SalesHistory.product_id == product_id)
+                .scalar()
+            )
+            rolled_up = (
+                db.session.query(db.func.coalesce(db.func.sum(DailySalesRollup.qty), 0))
+                .filter(DailySalesRollup.product_id == product_id)
+                .scalar()
+            )
+
+            click.echo(f"sales: {sales} in {elapsed:.2f}s ({sales / elapsed:.0f}/s), workers: {workers}")
+            click.echo(f"outcomes: {dict(outcomes)}")
+            click.echo(f"latency p50: {latencies[len(latencies) // 2] * 1000:.1f}ms, "
+                       f"p99: {latencies[int(len(latencies) * 0.99)] * 1000:.1f}ms")
+            click.echo(f"stock: {stock} -> {remaining}, units recorded as sold: {recorded}, "
+                       f"in the rollup: {rolled_up}")
+        finally:
+            db.session.rollback()
+            remove_stress_tenant(tenant_id, product_id)
+
+        if remaining < 0 or recorded != stock - remaining:
+            raise click.ClickException("stock and sales history disagree, sales were oversold")
+        if outcomes["sold"] * quantity != recorded:
+            raise click.ClickException("committed sales and recorded units disagree")
+        if rolled_up != recorded:
+            raise click.ClickException("daily rollup and sales history disagree")
+        if outcomes["lock error"]:
+            raise click.ClickException(f"{outcomes['lock error']} sales failed on lock waits")
+        # with no lock errors every sale that fit was made, none were refused early
+        if recorded != min(stock // quantity, sales) * quantity:
+            raise click.ClickException("sales were refused while stock was left")
+        click.echo("no oversell")
+
+    @app.cli.command("rollup-backfill")
+    @click.option("--user-id", type=int, help="Only rebuild this tenant.")
+    @click.option("--chunk-size", default=1000, help="Rollup rows written per statement.")
+    def rollup_backfill(user_id, chunk_size):
+        """Rebuild DailySalesRollup from SalesHistory, run it while sales are quiet."""
+        if user_id:
+            user_ids = [user_id]
+        else:
+            user_ids = [row.id for row in db.session.query(User.id).order_by(User.id)]
+
+        day = db.func.date(SalesHistory.created_at, type_=db.Date)
+
+        for tenant_id in user_ids:
+            totals = (
+                db.session.query(
+                    day.label("day"),
+                    SalesHistory.product_id,
+                    db.func.sum(SalesHistory.quantity).label("qty"),
+                    db.func.sum(SalesHistory.total_price).label("revenue"),
+                    db.func.sum(SalesHistory.profit).label("profit")
+                )
+                .join(Product, Product.id == SalesHistory.product_id)
+                .filter(Product.user_id == tenant_id)
+                .group_by(day, SalesHistory.product_id)
+                .all()
+            )
+
+            db.session.query(DailySalesRollup).filter(
+                DailySalesRollup.user_id == tenant_id).delete(synchronize_session=False)
+
+            rows = [
+                {
+                    "user_id": tenant_id,
+                    "day": row.day,
+                    "product_id": row.product_id,
+                    "qty": row.qty,
+                    "revenue": row.revenue,
+                    "profit": row.profit
+                }
+                for row in totals
+            ]
+            # overwrite rather than add so re-running the backfill is safe
+            for start in range(0, len(rows), chunk_size):
+                upsert(
+                    DailySalesRollup,
+                    rows[start:start + chunk_size],
+                    keys=("user_id", "day", "product_id"),
+                    update=("qty", "revenue", "profit")
+                )
+            db.session.commit()
+
+            click.echo(f"user {tenant_id}: {len(rows)} rollup rows")
+
+    from stock_manage.forecast import WINDOW_DAYS, LEAD_TIME_DAYS, REVIEW_DAYS
+
+    @app.cli.command("forecast-reorder")
+    @click.option("--chunk-size", default=2000, help="Products forecast per batch.")
+    @click.option("--window-days", default=WINDOW_DAYS, help="Days of sales history to learn from.")
+    @click.option("--lead-time-days", default=LEAD_TIME_DAYS, help="Days a reorder takes to arrive.")
+    @click.option("--review-days", default=REVIEW_DAYS, help="Days of demand each order should cover.")
+    def forecast_reorder_command(chunk_size, window_days, lead_time_days, review_days):
+        """Recompute ReorderSuggestion for every active product, run it nightly."""
+        from datetime import datetime, timedelta
+        from stock_manage.forecast import demand_matrix, forecast_reorder
+
+        today = datetime.utcnow().date()
+        start = today - timedelta(days=window_days)
+        last_id = 0
+        products_done = 0
+        rows_read = 0
+        started = time.perf_counter()
+
+        while True:
+            # walk the catalog in id order so memory stays at one chunk
+            products = (
+                db.session.query(Product.id, Product.user_id, Product.remaining_stock)
+                .filter(Product.id > last_id, Product.status == "active")
+                .order_by(Product.id)
+                .limit(chunk_size)
+                .all()
+            )
+            if not products:
+                break
+
+            product_ids = [product.id for product in products]
+            sales = (
+                db.session.query(
+                    DailySalesRollup.product_id, DailySalesRollup.day, DailySalesRollup.qty)
+                .filter(
+                    DailySalesRollup.user_id.in_({product.user_id for product in products}),
+                    DailySalesRollup.day >= start,
+                    DailySalesRollup.day < today,
+                    DailySalesRollup.product_id.in_(product_ids))
+                .all()
+            )
+
+            demand = demand_matrix(sales, product_ids, start, window_days)
+            result = forecast_reorder(
+                demand,
+                np.array([product.remaining_stock for product in products], dtype=float),
+                lead_time=lead_time_days,
+                review=review_days
+            )
+
+            now = datetime.utcnow()
+            rows = [
+                {
+                    "product_id": product.id,
+                    "user_id": product.user_id,
+                    "demand_rate": round(float(result["demand_rate"][i]), 3),
+                    "forecast": round(float(result["forecast"][i]), 3),
+                    "days_of_cover": None if np.isnan(result["days_of_cover"][i])
+                        else round(float(result["days_of_cover"][i]), 1),
+                    "reorder_point": int(result["reorder_point"][i]),
+                    "order_quantity": int(result["order_quantity"][i]),
+                    "computed_at": now
+                }
+                for i, product in enumerate(products)
+            ]
+            upsert(
+                ReorderSuggestion,
+                rows,
+                keys=("product_id",),
+                update=("user_id", "demand_rate", "forecast", "days_of_cover",
+                        "reorder_point", "order_quantity", "computed_at")
+            )
+            db.session.commit()
+
+            last_id = product_ids[-1]
+            products_done += len(products)
+            rows_read += len(sales)
+
+        elapsed = time.perf_counter() - started
+        click.echo(f"products: {products_done}, rollup rows read: {rows_read}")
+        click.echo(f"took {elapsed:.2f}s ({products_done / max(elapsed, 1e-9):.0f} products/s)")
+
+    @app.cli.command("expire-sweep")
+    @click.option("--batch-size", default=1000, help="Products archived per statement.")
+    @click.option("--dry-run", is_flag=True, help="Only count what would be archived.")
+    def expire_sweep(batch_size, dry_run):
+        """Archive active products past their expiration date, run it daily."""
+        from datetime import datetime
+        from .versions import bump_data_version
+
+        today = datetime.utcnow().date()
+        expired = (
+            db.session.query(Product.id, Product.user_id)
+            .filter(Product.status == "active", Product.expiration_date < today)
+        )
+
+        if dry_run:
+            click.echo(f"{expired.count()} expired products would be archived")
+            return
+
+        archived = 0
+        started = time.perf_counter()
+        while True:
+            # ix_product_status_expiration finds each batch without a scan
+            batch = expired.order_by(Product.id).limit(batch_size).all()
+            if not batch:
+                break
+
+            db.session.execute(
+                db.update(Product)
+                .where(Product.id.in_([row.id for row in batch]), Product.status == "active")
+                .values(status="archived", archived_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            for user_id in sorted({row.user_id for row in batch}):
+                bump_data_version(user_id)
+            db.session.commit()
+            archived += len(batch)
+
+        elapsed = time.perf_counter() - started
+        click.echo(f"archived {archived} expired products in {elapsed:.2f}s")
+
+    @app.cli.command("export-cleanup")
+    def export_cleanup():
+        """Delete finished export jobs and files past their retention, run it hourly."""
+        from excel_export.jobs import purge_exports
+
+        click.echo(f"purged {purge_exports()} export jobs")
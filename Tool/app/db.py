@@ -1,9 +1,13 @@
 from flask_sqlalchemy import SQLAlchemy
 from .utils_logger import AppLogger
 from flask_migrate import Migrate
+from .cache import Cache
+from .events import Events
 
 db = SQLAlchemy()
 migrate = Migrate()
+cache = Cache()
+events = Events()
 
 app_logger = AppLogger()
 
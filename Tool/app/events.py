@@ -0,0 +1,185 @@
+import os
+import queue
+import threading
+import time
+from flask import current_app
+
+
+class LocalBroker:
+    """In-process fan-out, a stream only sees events raised in its own worker."""
+
+    def __init__(self, backlog=100):
+        self.backlog = backlog
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def publish(self, user_id, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for messages in subscribers:
+            try:
+                messages.put_nowait(message)
+            except queue.Full:
+                # a client that stopped reading misses events, it refetches on reconnect
+                pass
+
+    def subscribe(self, user_id):
+        messages = queue.Queue(maxsize=self.backlog)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(messages)
+
+        def close():
+            with self._lock:
+                subscribers = self._subscribers.get(user_id)
+                if subscribers is not None:
+                    subscribers.discard(messages)
+                    if not subscribers:
+                        del self._subscribers[user_id]
+
+        return LocalSubscription(messages, close)
+
+
+class LocalSubscription:
+
+    def __init__(self, messages, close):
+        self._messages = messages
+        self.close = close
+
+    def get(self, timeout):
+        try:
+            return self._messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class RedisBroker:
+    """Pub/sub through Redis, so every worker's streams see every write."""
+
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+
+    def publish(self, user_id, message):
+        self.client.publish(f"events:{user_id}", message)
+
+    def subscribe(self, user_id):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(f"events:{user_id}")
+        return RedisSubscription(pubsub)
+
+
+class RedisSubscription:
+
+    def __init__(self, pubsub):
+        self._pubsub = pubsub
+
+    def get(self, timeout):
+        message = self._pubsub.get_message(timeout=timeout)
+        return message["data"] if message else None
+
+    def close(self):
+        self._pubsub.close()
+
+
+class CountedSubscription:
+    """A subscription holding one of the worker's stream slots until it's closed."""
+
+    def __init__(self, subscription, release):
+        self._subscription = subscription
+        self._release = release
+        self._lock = threading.Lock()
+
+    def get(self, timeout):
+        return self._subscription.get(timeout)
+
+    def close(self):
+        # called by the stream and again when the response closes
+        with self._lock:
+            release, self._release = self._release, None
+        if release is not None:
+            self._subscription.close()
+            release()
+
+
+class Events:
+    """Per-tenant live events for the dashboard, delivered as server-sent events.
+
+    Write paths call publish() after they commit; each open stream gets
+    the events of its own tenant. Delivery is best effort: the stream is
+    a hint to refresh, the REST endpoints stay the source of truth.
+
+    Every open stream holds a gunicorn thread, so a worker serves at most
+    max_streams of them and keeps the rest of its threads for requests.
+    """
+
+    def __init__(self):
+        self.broker = None
+        self.heartbeat = 15
+        self.max_seconds = 300
+        self.max_streams = 8
+        self._open_streams = 0
+        self._slots_lock = threading.Lock()
+
+    def init_app(self, app):
+        url = app.config.get("EVENTS_REDIS_URL") or app.config.get("CACHE_REDIS_URL")
+        self.broker = RedisBroker(url) if url else LocalBroker()
+        self.heartbeat = int(os.getenv("STREAM_HEARTBEAT", 15))
+        self.max_seconds = int(os.getenv("STREAM_MAX_SECONDS", 300))
+        # half the worker's threads by default
+        self.max_streams = int(os.getenv(
+            "STREAM_MAX_PER_WORKER", int(os.getenv("GUNICORN_THREADS", 16)) // 2))
+        app.extensions["events"] = self
+
+    def publish(self, user_id, kind, data):
+        if self.broker is None:
+            return
+        message = f"event: {kind}\ndata: {current_app.json.dumps(data)}\n\n"
+        try:
+            self.broker.publish(user_id, message)
+        except Exception as e:
+            current_app.logger.warning(f"event publish failed: {e}")
+
+    def subscribe(self, user_id):
+        """A subscription for one stream, or None when this worker has max_streams open."""
+        with self._slots_lock:
+            if self._open_streams >= self.max_streams:
+                return None
+            self._open_streams += 1
+        try:
+            subscription = self.broker.subscribe(user_id)
+        except Exception:
+            self._release_slot()
+            raise
+        return CountedSubscription(subscription, self._release_slot)
+
+    def _release_slot(self):
+        with self._slots_lock:
+            self._open_streams -= 1
+
+    def stream(self, subscription):
+        """SSE frames for one client, ends after max_seconds and the browser reconnects.
+
+        Runs outside the request context, it must not touch the database.
+        """
+        yield "retry: 3000\n\n"
+        deadline = time.monotonic() + self.max_seconds
+        last_write = time.monotonic()
+        try:
+            while True:
+                now = time.monotonic()
+                if now >= deadline:
+                    yield "event: reconnect\ndata: {}\n\n"
+                    return
+                message = subscription.get(timeout=min(self.heartbeat, deadline - now))
+                if message is not None:
+                    yield message
+                    last_write = time.monotonic()
+                elif time.monotonic() - last_write >= self.heartbeat:
+                    # comment line, keeps proxies from closing an idle stream
+                    # and lets us notice a client that went away
+                    yield ": ping\n\n"
+                    last_write = time.monotonic()
+        finally:
+            subscription.close()
+
@@ -0,0 +1,221 @@
+import os
+from flask import current_app, g
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from itsdangerous import BadData, URLSafeTimedSerializer
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+from .db import db, cache
+from .models import User
+from .cache import TTLCache
+
+
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", 60))
+# without a shared cache, the longest a revoked token still works on a
+# worker other than the one that revoked it
+TOKEN_VERSION_TTL = int(os.getenv("TOKEN_VERSION_TTL", 30))
+STREAM_TOKEN_SECONDS = int(os.getenv("STREAM_TOKEN_SECONDS", 60))
+
+# Per-worker cache of user rows keyed by JWT identity (the email).
+# Every gunicorn worker holds its own copy and forget_user() only clears
+# this worker's, so an entry can be up to USER_CACHE_TTL old: it is only
+# good for reading identity fields, see get_current_user().
+_user_cache = TTLCache(
+    maxsize=int(os.getenv("USER_CACHE_SIZE", 2048)),
+    ttl=USER_CACHE_TTL
+)
+
+# Per-worker cache of user id -> token_version for the revocation check,
+# used when there is no shared cache; see _token_version().
+_token_versions = TTLCache(
+    maxsize=int(os.getenv("USER_CACHE_SIZE", 2048)),
+    ttl=TOKEN_VERSION_TTL
+)
+
+# never cached, routes that check the password load the row
+SNAPSHOT_EXCLUDE = ("password",)
+
+
+def _snapshot(user):
+    return {
+        attr.key: getattr(user, attr.key)
+        for attr in inspect(User).column_attrs
+        if attr.key not in SNAPSHOT_EXCLUDE
+    }
+
+
+def _from_snapshot(snapshot):
+    # detached and never added to the session, so nothing done to it is flushed
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return user
+
+
+def get_current_user():
+    """Return a read-only snapshot of the User behind the current JWT.
+
+    The snapshot may be up to USER_CACHE_TTL old and is not in the session.
+    Use it for identity fields (id, email, role, business name, currency);
+    anything that reads a balance or the password, or changes the user,
+    must use load_current_user() instead.
+    """
+    if "current_user" in g:
+        return g.current_user
+
+    email = get_jwt_identity()
+    user = None
+
+    if email:
+        snapshot = _user_cache.get(email)
+        if snapshot is None:
+            row = User.query.filter_by(email=email).first()
+            if row:
+                snapshot = _snapshot(row)
+                _user_cache.set(email, snapshot)
+        if snapshot is not None:
+            user = _from_snapshot(snapshot)
+
+    g.current_user = user
+    return user
+
+
+def load_current_user(for_update=False):
+    """Load the current JWT user's row from the database, in the session.
+
+    for_update locks the row until commit, for read-modify-write changes.
+    """
+    query = User.query.filter_by(email=get_jwt_identity())
+    if for_update:
+        query = query.with_for_update()
+    return query.first()
+
+
+def user_claims(user):
+    """Extra JWT claims so protected routes don't have to look the user up."""
+    return {
+        "user_id": user.id,
+        "role": user.role,
+        "currency": user.currency,
+        "business_name": user.business_name,
+        "token_version": user.token_version or 0
+    }
+
+
+def current_user_id():
+    """Return the user id from the JWT, falling back to a lookup for older tokens."""
+    user_id = get_jwt().get("user_id")
+    if user_id is not None:
+        return user_id
+
+    user = get_current_user()
+    return user.id if user else None
+
+
+def current_role():
+    role = get_jwt().get("role")
+    if role is not None:
+        return role
+
+    user = get_current_user()
+    return user.role if user else None
+
+
+def is_token_revoked(jwt_header, jwt_payload):
+    """JWT blocklist loader: a token is revoked once the user's token_version moves on."""
+    user_id = jwt_payload.get("user_id")
+    if user_id is None:
+        # issued before claims were added: found by its identity and held
+        # to version 0, so the first revocation since then ends it too
+        user_id = _user_id_for(jwt_payload.get(current_app.config.get("JWT_IDENTITY_CLAIM", "sub")))
+        if user_id is None:
+            return True
+
+    version = _token_version(user_id)
+    if version is None:
+        return True
+
+    return jwt_payload.get("token_version", 0) != version
+
+
+def _token_version_key(user_id):
+    return f"user:{user_id}:token_version"
+
+
+def _user_id_for(email):
+    if not email:
+        return None
+    snapshot = _user_cache.get(email)
+    if snapshot is not None:
+        return snapshot["id"]
+    return db.session.query(User.id).filter_by(email=email).scalar()
+
+
+def _token_version(user_id):
+    # in a shared backend a revocation holds on every worker at once; per
+    # worker the version is kept TOKEN_VERSION_TTL, the most it can lag
+    if cache.shared:
+        version = cache.get(_token_version_key(user_id))
+        if version is not None:
+            return int(version)
+    else:
+        version = _token_versions.get(user_id)
+        if version is not None:
+            return version
+
+    version = db.session.query(User.token_version).filter_by(id=user_id).scalar()
+    if version is None:
+        return None
+    if cache.shared:
+        # add, not set: a value written by forget_user() since our read wins
+        cache.add(_token_version_key(user_id), version, ttl=USER_CACHE_TTL)
+    else:
+        _token_versions.set(user_id, version)
+    return version
+
+
+def revoke_tokens(user):
+    """Invalidate every token issued to this user, takes effect on commit.
+
+    This worker stops accepting them as soon as forget_user() runs after
+    the commit, other workers within TOKEN_VERSION_TTL (at once with a
+    shared cache).
+    """
+    user.token_version = (user.token_version or 0) + 1
+    _token_versions.delete(user.id)
+
+
+def forget_user(user):
+    """Drop this worker's cached user row, call this after committing a change to it.
+
+    The shared token version is overwritten rather than deleted, so every
+    worker sees a revocation on its next check.
+    """
+    _user_cache.delete(user.email)
+    _token_versions.delete(user.id)
+    if cache.shared:
+        cache.set(_token_version_key(user.id), user.token_version or 0, ttl=USER_CACHE_TTL)
+
+
+def _stream_signer():
+    return URLSafeTimedSerializer(current_app.config["JWT_SECRET_KEY"], salt="dashboard-stream")
+
+
+def issue_stream_token(user):
+    """A token that only opens the dashboard stream, valid for STREAM_TOKEN_SECONDS.
+
+    EventSource can't send headers, so the stream is opened with this in
+    the query string (and the access logs) instead of the access token.
+    """
+    return _stream_signer().dumps({"user_id": user.id, "token_version": user.token_version or 0})
+
+
+def stream_token_user_id(token):
+    """The user id a stream token was issued to, None if it's bad, expired or revoked."""
+    try:
+        claims = _stream_signer().loads(token, max_age=STREAM_TOKEN_SECONDS)
+        user_id = claims["user_id"]
+    except (BadData, KeyError, TypeError):
+        return None
+
+    if claims.get("token_version") != _token_version(user_id):
+        return None
+    return user_id
@@ -1,7 +1,9 @@
 from flask import Flask
 from flask_jwt_extended import JWTManager
 from datetime import timedelta
-from .db import db, app_logger, migrate
+from .db import db, app_logger, migrate, cache, events
+from .identity import is_token_revoked
+from .commands import register_commands
 from flask_cors import CORS
 import pymysql
 import os
@@ -50,8 +52,9 @@ CORS(app, resources={
             "https://saas-tool-mf02.onrender.com"
         ],
         "supports_credentials": True,
-        "allow_headers": ["Content-Type", "Authorization"],
-        "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"]
+        "allow_headers": ["Content-Type", "Authorization", "If-None-Match"],
+        "expose_headers": ["X-Next-Cursor", "X-Total-Count", "ETag"],
+        "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
     }
 })
 
@@ -71,6 +74,10 @@ app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['PAYSTACK_SECRET_KEY'] = os.getenv('PAYSTACK_SECRET_KEY')
 app.config['ARKESEL_SMS_KEY'] = os.getenv('ARKESEL_SMS_KEY')
 app.config['RESEND_API_KEY'] = os.getenv('RESEND_API_KEY')
+# shared response cache across workers, in-process when unset
+app.config['CACHE_REDIS_URL'] = os.getenv('CACHE_REDIS_URL')
+# live dashboard events, falls back to the cache's Redis
+app.config['EVENTS_REDIS_URL'] = os.getenv('EVENTS_REDIS_URL')
 
 
 app.register_blueprint(security, url_prefix='/security')
@@ -91,7 +98,11 @@ app.register_blueprint(servicesales, url_prefix='/servicesales')
 # Initializing extensions
 db.init_app(app)
 jwt = JWTManager(app)
+jwt.token_in_blocklist_loader(is_token_revoked)
 migrate.init_app(app, db)
+cache.init_app(app)
+events.init_app(app)
+register_commands(app)
 
 
 
@@ -16,8 +16,10 @@ class User(db.Model):
     verification_token = db.Column(db.String(100), unique=True, nullable=True)
     verification_token_expiry = db.Column(db.DateTime, nullable=True)
     is_verified = db.Column(db.Boolean, default=False)
-    reset_token = db.Column(db.String(255), nullable=True)
+    reset_token = db.Column(db.String(255), nullable=True, index=True)
     reset_expires = db.Column(db.DateTime, nullable=True)
+    # bumped to revoke every JWT issued to this user
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     products = db.relationship('Product', backref='user', lazy=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     spent = db.relationship('Spent', backref='user', lazy=True)
@@ -25,6 +27,13 @@ class User(db.Model):
     store_product = db.relationship('Store_product', backref='user', lazy=True)
 
 class Product(db.Model):
+    __table_args__ = (
+        db.Index("ix_product_user_status", "user_id", "status"),
+        db.Index("ix_product_user_stock", "user_id", "remaining_stock", "reorder_point"),
+        db.Index("ix_product_user_expiration", "user_id", "expiration_date"),
+        db.Index("ix_product_status_expiration", "status", "expiration_date"),
+        db.UniqueConstraint("user_id", "product_name", name="uq_product_user_name"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     product_name = db.Column(db.String(250), nullable=False)
@@ -33,7 +42,7 @@ class Product(db.Model):
     initial_stock = db.Column(db.Integer, nullable=False)
     remaining_stock = db.Column(db.Integer, nullable=False)
     reorder_point = db.Column(db.Integer, default=10)
-    expiration_date = db.Column(db.String(250), nullable=True)
+    expiration_date = db.Column(db.Date, nullable=True)
     supplier_info = db.Column(db.String(1000))
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -42,7 +51,23 @@ class Product(db.Model):
      # relationship to sales
     sales = db.relationship("SalesHistory", back_populates="product", cascade="all, delete-orphan")
 
+# the same FULLTEXT index the 7db14fe95e95 migration adds, for databases
+# built by db.create_all(); MySQL only, search falls back to LIKE elsewhere
+db.event.listen(
+    Product.__table__,
+    "after_create",
+    db.DDL(
+        "ALTER TABLE product ADD FULLTEXT INDEX ft_product_search "
+        "(product_name, supplier_info) WITH PARSER ngram"
+    ).execute_if(dialect="mysql")
+)
+
+
 class SalesHistory(db.Model):
+    __table_args__ = (
+        db.Index("ix_sales_history_product_created", "product_id", "created_at"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     product_id = db.Column(db.Integer, db.ForeignKey("product.id"), nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
@@ -54,6 +79,71 @@ class SalesHistory(db.Model):
     product = db.relationship("Product", back_populates="sales")
 
 
+class DailySalesRollup(db.Model):
+    # one row per tenant, day and product, updated in the same
+    # transaction as every sale so analytics never scan SalesHistory
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    product_id = db.Column(
+        db.Integer, db.ForeignKey('product.id', ondelete='CASCADE'), primary_key=True)
+    qty = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(12,2), nullable=False, default=0)
+    profit = db.Column(db.Numeric(12,2), nullable=False, default=0)
+
+
+class TenantDataVersion(db.Model):
+    # bumped by every write that changes what a tenant's catalog or
+    # dashboard reads return, the ETags of those reads are built from it
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+class ReorderSuggestion(db.Model):
+    # written by `flask forecast-reorder`, one row per active product
+    product_id = db.Column(
+        db.Integer, db.ForeignKey('product.id', ondelete='CASCADE'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    demand_rate = db.Column(db.Numeric(12,3), nullable=False)
+    forecast = db.Column(db.Numeric(12,3), nullable=False)
+    days_of_cover = db.Column(db.Numeric(12,1), nullable=True)
+    reorder_point = db.Column(db.Integer, nullable=False)
+    order_quantity = db.Column(db.Integer, nullable=False)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class ExportJob(db.Model):
+    # a tenant can have one queued or running job per set of params: the
+    # unique index only sees active jobs, active_key is cleared when one ends
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "active_key", name="uq_export_job_active"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    kind = db.Column(db.String(30), nullable=False)
+    params = db.Column(db.JSON, nullable=True)
+    active_key = db.Column(db.String(64), nullable=True)
+    # queued, running, done, failed
+    status = db.Column(db.String(20), default='queued', nullable=False)
+    rows_done = db.Column(db.Integer, default=0, nullable=False)
+    rows_total = db.Column(db.Integer, nullable=True)
+    file_size = db.Column(db.BigInteger, nullable=True)
+    error = db.Column(db.String(500), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # heartbeat of the worker that owns the job, one that stops moving was lost
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+
+class ExportChunk(db.Model):
+    # a finished export's file in the database, so any worker or instance
+    # can serve it, split up to stay under MySQL's max_allowed_packet
+    job_id = db.Column(
+        db.Integer, db.ForeignKey('export_job.id', ondelete='CASCADE'), primary_key=True)
+    seq = db.Column(db.Integer, primary_key=True)
+    data = db.Column(db.LargeBinary(length=(2 ** 24) - 1), nullable=False)
+
+
 class Payment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     
@@ -75,6 +165,10 @@ class Payment(db.Model):
 
 
 class SMSHistory(db.Model):
+    __table_args__ = (
+        db.Index("ix_sms_history_user_created", "user_id", "created_at"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     recipient = db.Column(db.String(255), nullable=False)
@@ -87,11 +181,15 @@ class SMSHistory(db.Model):
 
 class SMScontacts(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
     contact = db.Column(db.String(255), nullable=False)
     category = db.Column(db.String(255))
 
 class Spent(db.Model):
+    __table_args__ = (
+        db.Index("ix_spent_user_date", "user_id", "date"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     description = db.Column(db.String(255))
@@ -141,7 +239,7 @@ class Blog(db.Model):
 class Services(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
     service_name = db.Column(db.String(300))
     description = db.Column(db.String(400))
     pricing_type = db.Column(db.String(300))  # fixed, hourly or custom
@@ -0,0 +1,129 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from flask import jsonify
+from sqlalchemy import and_, or_
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _dump(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"n": str(value)}
+    return value
+
+
+def _load(value):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "n" in value:
+            return Decimal(value["n"])
+        raise InvalidCursor("invalid cursor")
+    if isinstance(value, list):
+        raise InvalidCursor("invalid cursor")
+    return value
+
+
+def encode_cursor(values):
+    raw = json.dumps([_dump(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise InvalidCursor("invalid cursor")
+
+    if not isinstance(values, list):
+        raise InvalidCursor("invalid cursor")
+    try:
+        return [_load(value) for value in values]
+    except (TypeError, KeyError, ValueError, ArithmeticError):
+        # well-formed base64 and JSON, but not a cursor we wrote
+        raise InvalidCursor("invalid cursor")
+
+
+def page_size(args, default=DEFAULT_PAGE_SIZE):
+    return min(max(args.get("limit", default, type=int), 1), MAX_PAGE_SIZE)
+
+
+def paging_requested(args):
+    # opt-in, clients that send neither still get the whole list
+    return "limit" in args or "cursor" in args
+
+
+def first_page(args):
+    # totals are counted on the first page only, later pages reuse it
+    return paging_requested(args) and not args.get("cursor")
+
+
+def _after(columns, values, descending):
+    # (a, b) < (x, y) spelled out so every database can range-scan it
+    column, value = columns[0], values[0]
+    beyond = column < value if descending else column > value
+    if len(columns) == 1:
+        return beyond
+    return or_(beyond, and_(column == value, _after(columns[1:], values[1:], descending)))
+
+
+def _order(columns, descending):
+    return [column.desc() if descending else column.asc() for column in columns]
+
+
+def keyset_page(query, columns, key, cursor=None, limit=DEFAULT_PAGE_SIZE, descending=True):
+    """Fetch the page of `query` that follows `cursor`.
+
+    `columns` is the sort order and must end with a unique column such as
+    the id; `key(row)` returns those columns' values for a result row.
+    Returns (rows, next_cursor), next_cursor is None on the last page.
+    """
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(columns):
+            raise InvalidCursor("invalid cursor")
+        query = query.filter(_after(columns, values, descending))
+
+    rows = query.order_by(*_order(columns, descending)).limit(limit + 1).all()
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(key(rows[-1]))
+
+
+def page_or_all(query, columns, key, args, descending=True):
+    """One keyset page when ?limit= or ?cursor= was given, otherwise every row.
+
+    Both come back in the same order. Returns (rows, next_cursor), raises
+    InvalidCursor for a cursor we didn't write.
+    """
+    if not paging_requested(args):
+        return query.order_by(*_order(columns, descending)).all(), None
+    return keyset_page(query, columns, key, cursor=args.get("cursor"),
+                       limit=page_size(args), descending=descending)
+
+
+def list_response(items, next_cursor, total=None):
+    """jsonify a bare list, with the paging details in response headers."""
+    response = jsonify(items)
+    if total is not None:
+        response.headers["X-Total-Count"] = str(total)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
@@ -0,0 +1,88 @@
+from datetime import MAXYEAR, MINYEAR, date, datetime, time, timedelta
+from sqlalchemy import DateTime, extract
+
+
+class InvalidPeriod(ValueError):
+    pass
+
+
+def parse_day(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        raise InvalidPeriod("Invalid date format. Use YYYY-MM-DD.")
+
+
+def month_range(year, month=None):
+    """[start, end) of a whole month, or of the whole year when month is None."""
+    if not MINYEAR <= year < MAXYEAR:
+        raise InvalidPeriod("year is out of range")
+    if month is None:
+        return date(year, 1, 1), date(year + 1, 1, 1)
+    if not 1 <= month <= 12:
+        raise InvalidPeriod("month must be between 1 and 12")
+    if month == 12:
+        return date(year, 12, 1), date(year + 1, 1, 1)
+    return date(year, month, 1), date(year, month + 1, 1)
+
+
+def period_from_args(args):
+    """Turn ?date=, ?from=&to= or ?year=&month= into a half-open [start, end) range.
+
+    `date` means the whole month that contains it, as it always has on
+    these endpoints; `to` is inclusive. A month needs a year here, see
+    period_conditions(). Returns (None, None) when no filter was given.
+    """
+    date_str = args.get("date")
+    from_str = args.get("from")
+    to_str = args.get("to")
+    year = args.get("year", type=int)
+    month = args.get("month", type=int)
+
+    if date_str:
+        day = parse_day(date_str)
+        return month_range(day.year, day.month)
+
+    if from_str or to_str:
+        start = parse_day(from_str) if from_str else None
+        end = parse_day(to_str) + timedelta(days=1) if to_str else None
+        if start and end and start >= end:
+            raise InvalidPeriod("from must not be after to")
+        return start, end
+
+    if month and not year:
+        raise InvalidPeriod("month needs a year")
+    if year:
+        return month_range(year, month)
+
+    return None, None
+
+
+def in_period(column, start, end):
+    """Range predicates for filter(*...), so an index on `column` can be used."""
+    if isinstance(column.type, DateTime):
+        start = datetime.combine(start, time.min) if start else None
+        end = datetime.combine(end, time.min) if end else None
+
+    conditions = []
+    if start:
+        conditions.append(column >= start)
+    if end:
+        conditions.append(column < end)
+    return conditions
+
+
+def period_conditions(column, args):
+    """Filter predicates on `column` for ?date=, ?from=&to= or ?year=&month=.
+
+    A month without a year keeps its old meaning, that month in every
+    year. It is the one filter that can't be a range on the index.
+    """
+    month = args.get("month", type=int)
+    if month and not any(args.get(name) for name in ("date", "from", "to", "year")):
+        if not 1 <= month <= 12:
+            raise InvalidPeriod("month must be between 1 and 12")
+        return [extract("month", column) == month]
+
+    start, end = period_from_args(args)
+    return in_period(column, start, end)
@@ -0,0 +1,65 @@
+from flask import Response, current_app, stream_with_context
+
+
+STREAM_BATCH_SIZE = 1000
+
+
+def wants_stream(args):
+    return args.get("stream", "").lower() in ("1", "true", "yes")
+
+
+def _elements(query, serialize, batch_size):
+    # rows come off the cursor batch_size at a time and go out as one chunk
+    dumps = current_app.json.dumps
+    chunk = []
+    for row in query.yield_per(batch_size):
+        chunk.append(dumps(serialize(row)))
+        if len(chunk) >= batch_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _json_array(query, serialize, batch_size, counter):
+    yield "["
+    separator = ""
+    for chunk in _elements(query, serialize, batch_size):
+        counter[0] += len(chunk)
+        yield separator + ",".join(chunk)
+        separator = ","
+    yield "]"
+
+
+def stream_json_array(query, serialize, batch_size=STREAM_BATCH_SIZE):
+    """Stream every row of `query` as a JSON array, serialize(row) gives each element.
+
+    Only one batch of rows and its JSON is held in memory at a time.
+    """
+    def generate():
+        yield from _json_array(query, serialize, batch_size, [0])
+
+    return Response(stream_with_context(generate()), mimetype="application/json")
+
+
+def stream_json_object(query, serialize, key, fields=None, count_key=None,
+                       batch_size=STREAM_BATCH_SIZE):
+    """Stream a JSON object with the rows of `query` as an array under `key`.
+
+    `fields` are written before the array; when `count_key` is given the
+    number of streamed rows is written after it under that name.
+    """
+    dumps = current_app.json.dumps
+
+    def generate():
+        yield "{"
+        for name, value in (fields or {}).items():
+            yield f"{dumps(name)}:{dumps(value)},"
+        yield f"{dumps(key)}:"
+        counter = [0]
+        yield from _json_array(query, serialize, batch_size, counter)
+        if count_key:
+            yield f",{dumps(count_key)}:{counter[0]}"
+        yield "}"
+
+    return Response(stream_with_context(generate()), mimetype="application/json")
@@ -0,0 +1,33 @@
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from .db import db
+
+
+def upsert(model, rows, keys, increment=(), update=()):
+    """Insert rows, folding any that collide with an existing key into that row.
+
+    Columns in `increment` are added onto the existing values, columns in
+    `update` overwrite them. Runs in the caller's transaction.
+    """
+    if not rows:
+        return
+
+    table = model.__table__
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == "mysql":
+        stmt = mysql.insert(table).values(rows)
+        new = stmt.inserted
+    else:
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(table).values(rows)
+        new = stmt.excluded
+
+    changes = {name: table.c[name] + new[name] for name in increment}
+    changes.update({name: new[name] for name in update})
+
+    if dialect == "mysql":
+        stmt = stmt.on_duplicate_key_update(changes)
+    else:
+        stmt = stmt.on_conflict_do_update(index_elements=list(keys), set_=changes)
+
+    db.session.execute(stmt)
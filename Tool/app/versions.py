@@ -0,0 +1,52 @@
+import hashlib
+from flask import current_app, request
+from .db import db
+from .models import TenantDataVersion
+from .upsert import upsert
+
+
+def bump_data_version(user_id):
+    """Mark the tenant's data as changed, in the caller's transaction.
+
+    Call it as the last statement before commit: the version row stays
+    locked until then, so keep that window short. Cached responses are
+    keyed on the version, so once it commits no worker serves older ones.
+    """
+    upsert(
+        TenantDataVersion,
+        [{"user_id": user_id, "version": 1}],
+        keys=("user_id",),
+        increment=("version",)
+    )
+
+
+def data_version(user_id):
+    version = (
+        db.session.query(TenantDataVersion.version)
+        .filter(TenantDataVersion.user_id == user_id)
+        .scalar()
+    )
+    return version or 0
+
+
+def data_etag(user_id, version=None):
+    """Strong ETag for this request's view of the tenant's data.
+
+    Read it before the data itself, so a write that lands in between makes
+    the tag older than the body rather than newer. Pass `version` when the
+    caller already read it, e.g. to key a cached body on the same one.
+    """
+    if version is None:
+        version = data_version(user_id)
+    variant = f"{request.path}?{sorted(request.args.items(multi=True))}"
+    digest = hashlib.sha1(variant.encode()).hexdigest()[:16]
+    return f"{user_id}-{version}-{digest}"
+
+
+def not_modified(etag):
+    """A 304 when the client already holds `etag`, otherwise None."""
+    if etag not in request.if_none_match:
+        return None
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    return response
@@ -1,7 +1,7 @@
 from functools import wraps
 from flask import jsonify, request
-from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
-from app.models import User
+from flask_jwt_extended import verify_jwt_in_request
+from app.identity import current_role
 
 def role_required(*allowed_roles):
     def wrapper(fn):
@@ -14,14 +14,14 @@ def role_required(*allowed_roles):
 
             # Verify JWT first
             verify_jwt_in_request()
-            current_email = get_jwt_identity()
 
-            current_user = User.query.filter_by(email=current_email).first()
+            # role comes from the token claims, no user lookup needed
+            role = current_role()
 
-            if not current_user:
+            if not role:
                 return jsonify({"message": "User not found"}), 404
 
-            if current_user.role not in allowed_roles:
+            if role not in allowed_roles:
                 return jsonify({"message": "Access denied"}), 403
 
             return fn(*args, **kwargs)
@@ -1,7 +1,8 @@
 from flask import jsonify, request, Blueprint
-from app.models import db, Blog, User
+from app.models import db, Blog
+from app.identity import get_current_user
 from app.db import app_logger
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from blog.decorator import role_required
 
 blog = Blueprint('blog', __name__)  # Fixed: __name__ without quotes
@@ -9,8 +10,7 @@ blog = Blueprint('blog', __name__)  # Fixed: __name__ without quotes
 
 # Helper function to check if user is admin
 def is_admin():
-    email = get_jwt_identity()
-    user = User.query.filter_by(email=email).first()
+    user = get_current_user()
     return user and user.role
 
 # ------------------------------
@@ -22,8 +22,7 @@ def is_admin():
 def create_blog():
     
     # Get author from current user
-    current_email = get_jwt_identity()
-    user = User.query.filter_by(email=current_email).first()
+    user = get_current_user()
     
     if not user:
         return jsonify({
@@ -79,12 +78,7 @@ def get_all_posts():
     #if request.method == "OPTIONS":
         #return jsonify({"message": "Preflight OK"}), 200
     
-    current_email = get_jwt_identity()
-    current_user = User.query.filter_by(email=current_email).first()
-    if not current_user:
-        return jsonify({
-            "message": "user not found"
-        }), 400
+    # role_required has already checked the user from the token claims
     
     posts = Blog.query.order_by(Blog.created_at.desc()).all()
     
@@ -170,13 +164,7 @@ def update_post(post_id):
     #if request.method == "OPTIONS":
         #return jsonify({"message": "Preflight OK"}), 200
     
-    current_email = get_jwt_identity()
-    current_user = User.query.filter_by(email=current_email).first()
-
-    if not current_user:
-        return jsonify({
-            "message": "user not found"
-        }), 400
+    # role_required has already checked the user from the token claims
     
     post = Blog.query.get_or_404(post_id)
     data = request.get_json()
@@ -218,12 +206,7 @@ def toggle_publish(post_id):
     if request.method == "OPTIONS":
         return jsonify({"message": "Preflight OK"}), 200
     
-    current_email = get_jwt_identity()
-    current_user = User.query.filter_by(email=current_email).first()
-    if not current_user:
-        return jsonify({
-            "message": "user not found "
-        }), 400
+    # role_required has already checked the user from the token claims
     
     post = Blog.query.get_or_404(post_id)
     data = request.get_json()
@@ -248,16 +231,7 @@ def delete_post(post_id):
     #if request.method == "OPTIONS":
         #return jsonify({"message": "Preflight OK"}), 200
     
-    current_email = get_jwt_identity()
-
-    current_user = User.query.filter_by(email=current_email).first()
-    if not current_user:
-        return jsonify({
-            "message": "user not found "
-        }), 400
-
-
-
+    # role_required has already checked the user from the token claims
     post = Blog.query.get_or_404(post_id)
     
     db.session.delete(post)
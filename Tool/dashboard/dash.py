@@ -1,6 +1,12 @@
-from flask import request, Blueprint, jsonify
-from app.models import User, Product
-from flask_jwt_extended import get_jwt_identity, jwt_required
+from flask import request, Blueprint, Response, jsonify
+from datetime import datetime, timedelta
+from app.db import db, cache, events
+from app.models import Product, DailySalesRollup, Spent, Services, Servicesales
+from app.identity import (
+    get_current_user, load_current_user, issue_stream_token, stream_token_user_id,
+    STREAM_TOKEN_SECONDS)
+from app.versions import data_version, data_etag, not_modified
+from flask_jwt_extended import jwt_required
 
 
 dashboard = Blueprint('dashboard', '__name__')
@@ -9,34 +15,196 @@ dashboard = Blueprint('dashboard', '__name__')
 @jwt_required()
 def board():
 
-    current_email = get_jwt_identity()
-    current_user = User.query.filter_by(
-        email=current_email).first()
+    current_user = get_current_user()
 
     if not current_user:
         return jsonify({"message":
             "user not found"
         }), 400
-    
+
+    # unchanged since the client's copy: one primary key lookup, no body
+    version = data_version(current_user.id)
+    etag = data_etag(current_user.id, version)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    # changed since the client's copy, but maybe not since another device
+    # asked: a body cached at this same version matches the tag
+    response = cache.response(current_user.id, version, "board")
+    if response is not None:
+        response.set_etag(etag)
+        return response, 200
+
+    # the snapshot can be a minute old, the body carries the live balance
+    user = load_current_user()
+
     all_pro = Product.query.filter_by(
-         user_id=current_user.id).all()
+         user_id=user.id).all()
     
     all_info = []
     for me in  all_pro:
         all_info.append({
-            "business_name": current_user.business_name,
+            "business_name": user.business_name,
             "product_name":me.product_name,
             "selling_price":float(me.selling_price),
             "amount_spent":float(me.amount_spent),
             "initial_stock":me.initial_stock,
-            "expiration_date":me.expiration_date,
+            "expiration_date":me.expiration_date.isoformat() if me.expiration_date else None,
             "remaining_stock":me.remaining_stock,
             "supplier_info":me.supplier_info,
-            "balance": float(current_user.sms_balance) if current_user.sms_balance is not None else 0.0
+            "balance": float(user.sms_balance) if user.sms_balance is not None else 0.0
         })
 
-    return jsonify(all_info), 200
-    
+    response = cache.save_response(user.id, version, "board", jsonify(all_info))
+    response.set_etag(etag)
+    return response, 200
 
-    
 
+def _money(value):
+    return round(float(value or 0), 2)
+
+
+@dashboard.route('/summary', methods=['GET'])
+@jwt_required()
+def summary():
+
+    current_user = get_current_user()
+
+    if not current_user:
+        return jsonify({"message":
+            "user not found"
+        }), 400
+
+    user_id = current_user.id
+    version = data_version(user_id)
+    cached = cache.response(user_id, version, "summary")
+    if cached is not None:
+        return cached, 200
+
+    # the snapshot can be a minute old, the body carries the live balance
+    user = load_current_user()
+
+    today = datetime.utcnow().date()
+    week_start = today - timedelta(days=today.weekday())
+    month_start = today.replace(day=1)
+    since = min(week_start, month_start)
+
+    # query 1: the catalog, plus all-time service income as a scalar subquery
+    service_income = (
+        db.select(db.func.coalesce(db.func.sum(Servicesales.income_received), 0))
+        .join(Services, Services.id == Servicesales.services_id)
+        .where(Services.user_id == user_id)
+        .scalar_subquery()
+    )
+    inventory = db.session.execute(
+        db.select(
+            db.func.count(Product.id).label("products"),
+            db.func.coalesce(db.func.sum(Product.remaining_stock), 0).label("units"),
+            db.func.sum(Product.remaining_stock * Product.amount_spent).label("cost_value"),
+            db.func.sum(Product.remaining_stock * Product.selling_price).label("retail_value"),
+            db.func.coalesce(db.func.sum(db.case(
+                (Product.remaining_stock <= Product.reorder_point, 1), else_=0)), 0).label("low_stock"),
+            service_income.label("service_income")
+        )
+        .where(Product.user_id == user_id, Product.status == "active")
+    ).one()
+
+    # query 2: this month's rollup rows split into today/week/month in one
+    # pass, with the expense windows as scalar subqueries on ix_spent_user_date
+    def sold(column, start):
+        return db.func.sum(db.case((DailySalesRollup.day >= start, column), else_=0))
+
+    def spent(start):
+        return (
+            db.select(db.func.coalesce(db.func.sum(Spent.amount), 0))
+            .where(Spent.user_id == user_id,
+                   Spent.date >= datetime.combine(start, datetime.min.time()))
+            .scalar_subquery()
+        )
+
+    windows = {"today": today, "week": week_start, "month": month_start}
+    columns = []
+    for name, start in windows.items():
+        columns += [
+            sold(DailySalesRollup.qty, start).label(f"{name}_quantity"),
+            sold(DailySalesRollup.revenue, start).label(f"{name}_revenue"),
+            sold(DailySalesRollup.profit, start).label(f"{name}_profit"),
+            spent(start).label(f"{name}_expenses")
+        ]
+    totals = db.session.execute(
+        db.select(*columns)
+        .where(DailySalesRollup.user_id == user_id, DailySalesRollup.day >= since)
+    ).one()._mapping
+
+    return cache.save_response(user_id, version, "summary", jsonify({
+        "business_name": user.business_name,
+        "currency": user.currency,
+        "as_of": today.isoformat(),
+        "sms_balance": float(user.sms_balance or 0),
+        "inventory": {
+            "products": inventory.products,
+            "units_in_stock": int(inventory.units),
+            "stock_value": _money(inventory.cost_value),
+            "retail_value": _money(inventory.retail_value),
+            "low_stock": int(inventory.low_stock)
+        },
+        "sales": {
+            name: {
+                "quantity": int(totals[f"{name}_quantity"] or 0),
+                "revenue": _money(totals[f"{name}_revenue"]),
+                "profit": _money(totals[f"{name}_profit"])
+            }
+            for name in windows
+        },
+        "expenses": {name: _money(totals[f"{name}_expenses"]) for name in windows},
+        "service_income": _money(inventory.service_income)
+    })), 200
+
+
+# EventSource can't send headers: the client trades its access token for a
+# short-lived stream token here and opens /stream?token=
+@dashboard.route('/stream/token', methods=['POST'])
+@jwt_required()
+def stream_token():
+
+    current_user = get_current_user()
+
+    if not current_user:
+        return jsonify({"message":
+            "user not found"
+        }), 400
+
+    return jsonify({
+        "token": issue_stream_token(current_user),
+        "expires_in": STREAM_TOKEN_SECONDS
+    }), 200
+
+
+@dashboard.route('/stream', methods=['GET'])
+def stream():
+
+    user_id = stream_token_user_id(request.args.get("token", ""))
+
+    if user_id is None:
+        return jsonify({"message":
+            "invalid or expired stream token"
+        }), 401
+
+    # subscribe before answering so nothing committed from here on is missed
+    subscription = events.subscribe(user_id)
+    if subscription is None:
+        response = jsonify({"message": "Too many live streams open, please retry."})
+        response.headers["Retry-After"] = "5"
+        return response, 503
+
+    # the stream stays open for minutes, give the pooled connection back now
+    db.session.remove()
+
+    response = Response(events.stream(subscription), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # stop nginx from buffering the frames
+    response.headers["X-Accel-Buffering"] = "no"
+    # a client that disconnects before the first frame never runs the generator
+    response.call_on_close(subscription.close)
+    return response
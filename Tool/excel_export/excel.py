@@ -1,69 +1,126 @@
-from flask import Blueprint,send_file, jsonify
-from openpyxl import Workbook
-import io
-from datetime import datetime
-from app.models import User, Product, Payment
-from flask_jwt_extended import get_jwt_identity, jwt_required
+from flask import Blueprint,send_file, jsonify, request, url_for, Response, stream_with_context
+import os
+from tempfile import SpooledTemporaryFile
+from app.models import Payment, ExportJob
+from app.identity import get_current_user
+from excel_export.workbook import XLSX_MIMETYPE, product_export_query, write_products
+from excel_export.jobs import enqueue_export, export_params, export_expires_at, read_export
+from flask_jwt_extended import jwt_required
 
 
 excel_export = Blueprint('excel_export', '__name__')
 
+# exports up to this size stay in memory, bigger ones roll over to disk
+EXPORT_SPOOL_SIZE = int(os.getenv("EXPORT_SPOOL_SIZE", 8 * 1024 * 1024))
+
 
 @excel_export.route("/export/excel", methods=['GET'])
 @jwt_required()
 def export_excel():
-    current_email = get_jwt_identity()
-    current_user = User.query.filter_by(email=current_email).first()
+    current_user = get_current_user()
 
     if not current_user:
         return jsonify({"message": "User not found"}), 400
 
-    products = Product.query.filter_by(user_id=current_user.id).all()
-
-    # Create workbook and sheet
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Products"
-
-    # Header row (fixed commas + consistent order)
-    ws.append([
-        "Product Name",
-        "Selling Price",
-        "Amount Spent",
-        "Initial Stock",
-        "Remaining Stock",
-        "Reorder Point",
-        "Expiration Date",
-        "Supplier Info",
-        "Date Created",
-        "Status"
-    ])
-
-    # Add rows from database
-    for product in products:
-        ws.append([
-            product.product_name,
-            product.selling_price,
-            product.amount_spent,
-            product.initial_stock,
-            product.remaining_stock,
-            product.reorder_point,
-            product.expiration_date.strftime("%Y-%m-%d") if product.expiration_date else "",
-            product.supplier_info or "",
-            product.created_at.strftime("%Y-%m-%d") if product.created_at else "",
-            product.status or ""
-        ])
-
-    # Save to memory
-    output = io.BytesIO()
-    wb.save(output)
+    output = SpooledTemporaryFile(max_size=EXPORT_SPOOL_SIZE)
+    try:
+        write_products(product_export_query(current_user.id), output)
+    except Exception:
+        output.close()
+        raise
     output.seek(0)
 
-    # Return file as attachment
+    # Return file as attachment, send_file closes it once it's been sent
     return send_file(
         output,
         as_attachment=True,
         download_name="products.xlsx",
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        mimetype=XLSX_MIMETYPE
     )
 
+
+def job_info(job):
+    info = {
+        "id": job.id,
+        "kind": job.kind,
+        "params": job.params,
+        "status": job.status,
+        "rows_done": job.rows_done,
+        "rows_total": job.rows_total,
+        "progress": (
+            round(100 * job.rows_done / job.rows_total) if job.rows_total
+            else 100 if job.status == "done" else 0
+        ),
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "expires_at": export_expires_at(job).isoformat() if job.finished_at else None
+    }
+    if job.status == "done":
+        info["file_url"] = url_for("excel_export.export_job_file", job_id=job.id)
+    return info
+
+
+#route to start an export in the background
+@excel_export.route("/jobs", methods=['POST'])
+@jwt_required()
+def create_export_job():
+    current_user = get_current_user()
+
+    if not current_user:
+        return jsonify({"message": "User not found"}), 400
+
+    try:
+        params = export_params(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    # the same export already running for this tenant is joined, not repeated
+    job, created = enqueue_export(current_user.id, params)
+
+    return jsonify({
+        "job": job_info(job),
+        "deduplicated": not created
+    }), 202 if created else 200
+
+
+#route to poll an export's progress
+@excel_export.route("/jobs/<int:job_id>", methods=['GET'])
+@jwt_required()
+def export_job(job_id):
+    current_user = get_current_user()
+
+    if not current_user:
+        return jsonify({"message": "User not found"}), 400
+
+    job = ExportJob.query.filter_by(id=job_id, user_id=current_user.id).first()
+    if not job:
+        return jsonify({"message": "Export not found"}), 404
+
+    return jsonify({"job": job_info(job)}), 200
+
+
+#route to download a finished export
+@excel_export.route("/jobs/<int:job_id>/file", methods=['GET'])
+@jwt_required()
+def export_job_file(job_id):
+    current_user = get_current_user()
+
+    if not current_user:
+        return jsonify({"message": "User not found"}), 400
+
+    job = ExportJob.query.filter_by(id=job_id, user_id=current_user.id).first()
+    if not job:
+        return jsonify({"message": "Export not found"}), 404
+
+    if job.status != "done":
+        return jsonify({"message": "Export is not ready", "status": job.status}), 409
+
+    if job.file_size is None:
+        return jsonify({"message": "Export file is no longer available"}), 410
+
+    # streamed from the database a chunk at a time, any worker can serve it
+    response = Response(stream_with_context(read_export(job.id)), mimetype=XLSX_MIMETYPE)
+    response.headers["Content-Disposition"] = f'attachment; filename="products-{job.id}.xlsx"'
+    response.headers["Content-Length"] = str(job.file_size)
+    return response
@@ -0,0 +1,261 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from app.db import db, app_logger
+from app.models import ExportJob, ExportChunk
+from excel_export.workbook import product_export_query, write_products
+
+
+EXPORT_STATUSES = ("active", "archived")
+
+# finished exports, files included, are deleted after this long
+EXPORT_RETENTION = timedelta(hours=int(os.getenv("EXPORT_RETENTION_HOURS", 24)))
+
+# the owning worker touches its queued and running jobs this often, a job
+# that hasn't been touched for EXPORT_STALE_AFTER died with its worker
+EXPORT_HEARTBEAT = int(os.getenv("EXPORT_HEARTBEAT_SECONDS", 60))
+EXPORT_STALE_AFTER = timedelta(seconds=int(os.getenv("EXPORT_STALE_SECONDS", 600)))
+
+# stored files are split into chunks of this size
+EXPORT_CHUNK_SIZE = 1024 * 1024
+
+# passes at joining or creating a job before giving up
+ENQUEUE_ATTEMPTS = 3
+
+# all a client sees of a failure, the exception goes to the log
+EXPORT_FAILED_MESSAGE = "export failed, please try again"
+
+# per gunicorn worker, jobs run next to the requests instead of blocking one
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("EXPORT_WORKERS", 2)), thread_name_prefix="export")
+
+# ids of the queued and running jobs this worker owns, see _heartbeat()
+_owned = set()
+_owned_lock = threading.Lock()
+_heartbeat_thread = None
+
+
+def export_params(data):
+    """Validate a job request body into the params the export runs with, raises ValueError."""
+    data = data or {}
+    kind = data.get("kind", "products")
+    if kind != "products":
+        raise ValueError("kind must be products")
+
+    status = data.get("status") or None
+    if status is not None and status not in EXPORT_STATUSES:
+        raise ValueError(f"status must be one of {', '.join(EXPORT_STATUSES)}")
+
+    return {"kind": kind, "status": status}
+
+
+def _active_key(params):
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+
+def _is_active_conflict(error):
+    # MySQL names the constraint, SQLite the columns
+    message = str(error.orig)
+    return "uq_export_job_active" in message or "export_job.active_key" in message
+
+
+def _release_stale(user_id, key):
+    db.session.execute(
+        db.update(ExportJob)
+        .where(ExportJob.user_id == user_id,
+               ExportJob.active_key == key,
+               ExportJob.updated_at < datetime.utcnow() - EXPORT_STALE_AFTER)
+        .values(status="failed", error="export was interrupted",
+                active_key=None, finished_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _own(app, job_id):
+    global _heartbeat_thread
+    with _owned_lock:
+        _owned.add(job_id)
+        # started on first use, so each forked worker gets its own
+        if _heartbeat_thread is None or not _heartbeat_thread.is_alive():
+            _heartbeat_thread = threading.Thread(
+                target=_heartbeat, args=(app,), name="export-heartbeat", daemon=True)
+            _heartbeat_thread.start()
+
+
+def _disown(job_id):
+    with _owned_lock:
+        _owned.discard(job_id)
+
+
+def _heartbeat(app):
+    # keeps the jobs waiting in or running on this worker's pool from
+    # looking abandoned, however long the queue or a single batch takes
+    while True:
+        time.sleep(EXPORT_HEARTBEAT)
+        with _owned_lock:
+            job_ids = list(_owned)
+        if not job_ids:
+            continue
+        try:
+            with app.app_context(), db.engine.begin() as connection:
+                connection.execute(
+                    db.update(ExportJob)
+                    .where(ExportJob.id.in_(job_ids), ExportJob.active_key.isnot(None))
+                    .values(updated_at=datetime.utcnow())
+                )
+        except Exception as e:
+            app.logger.warning(f"export heartbeat failed: {e}")
+
+
+def enqueue_export(user_id, params):
+    """Start an export, or join the tenant's identical one already in progress.
+
+    Returns (job, created).
+    """
+    key = _active_key(params)
+    purge_exports(user_id=user_id)
+
+    for _ in range(ENQUEUE_ATTEMPTS):
+        _release_stale(user_id, key)
+
+        job = ExportJob.query.filter_by(user_id=user_id, active_key=key).first()
+        if job:
+            db.session.commit()
+            return job, False
+
+        job = ExportJob(
+            user_id=user_id,
+            kind=params["kind"],
+            params=params,
+            active_key=key,
+            status="queued",
+            rows_done=0
+        )
+        db.session.add(job)
+        try:
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            if not _is_active_conflict(e):
+                raise
+            # an identical request committed its job first, join that one
+            continue
+
+        app = current_app._get_current_object()
+        _own(app, job.id)
+        _executor.submit(run_export, app, job.id)
+        return job, True
+
+    raise RuntimeError(f"could not queue export for user {user_id} after {ENQUEUE_ATTEMPTS} attempts")
+
+
+def _update_job(job_id, **values):
+    # on its own connection: the export's cursor is still streaming on the session's
+    with db.engine.begin() as connection:
+        connection.execute(
+            db.update(ExportJob)
+            .where(ExportJob.id == job_id)
+            .values(updated_at=datetime.utcnow(), **values)
+        )
+
+
+def _finish_job(job_id, **values):
+    _update_job(job_id, active_key=None, finished_at=datetime.utcnow(), **values)
+
+
+def _store_file(job_id, output, rows):
+    # the chunks and the "done" land together, a job is never done without its file
+    output.seek(0)
+    size = 0
+    with db.engine.begin() as connection:
+        seq = 0
+        while True:
+            data = output.read(EXPORT_CHUNK_SIZE)
+            if not data:
+                break
+            connection.execute(
+                db.insert(ExportChunk).values(job_id=job_id, seq=seq, data=data))
+            size += len(data)
+            seq += 1
+        connection.execute(
+            db.update(ExportJob)
+            .where(ExportJob.id == job_id)
+            .values(status="done", rows_done=rows, file_size=size, active_key=None,
+                    updated_at=datetime.utcnow(), finished_at=datetime.utcnow())
+        )
+
+
+def read_export(job_id):
+    """The stored file of a finished job, one chunk at a time."""
+    seq = 0
+    while True:
+        data = (
+            db.session.query(ExportChunk.data)
+            .filter(ExportChunk.job_id == job_id, ExportChunk.seq == seq)
+            .scalar()
+        )
+        if data is None:
+            return
+        yield data
+        seq += 1
+
+
+def export_expires_at(job):
+    return job.finished_at + EXPORT_RETENTION if job.finished_at else None
+
+
+def purge_exports(user_id=None, batch_size=100):
+    """Delete finished jobs and their files older than EXPORT_RETENTION, returns the count."""
+    cutoff = datetime.utcnow() - EXPORT_RETENTION
+    query = db.session.query(ExportJob.id).filter(
+        ExportJob.active_key.is_(None), ExportJob.finished_at < cutoff)
+    if user_id is not None:
+        query = query.filter(ExportJob.user_id == user_id)
+
+    purged = 0
+    while True:
+        job_ids = [job_id for job_id, in query.order_by(ExportJob.id).limit(batch_size)]
+        if not job_ids:
+            return purged
+        # chunks first, SQLite doesn't enforce the cascade
+        db.session.execute(db.delete(ExportChunk).where(ExportChunk.job_id.in_(job_ids)))
+        db.session.execute(db.delete(ExportJob).where(ExportJob.id.in_(job_ids)))
+        db.session.commit()
+        purged += len(job_ids)
+
+
+def run_export(app, job_id):
+    """Render one export job and store its file, runs on the export thread pool."""
+    with app.app_context():
+        try:
+            job = db.session.get(ExportJob, job_id)
+            if job is None or job.status != "queued":
+                return
+
+            try:
+                query = product_export_query(job.user_id, status=(job.params or {}).get("status"))
+                job.status = "running"
+                job.rows_total = query.count()
+                job.updated_at = datetime.utcnow()
+                db.session.commit()
+
+                # local scratch only, deleted on close; the file is kept in export_chunk
+                with tempfile.TemporaryFile() as output:
+                    rows = write_products(
+                        query, output,
+                        progress=lambda count: _update_job(job_id, rows_done=count))
+                    _store_file(job_id, output, rows)
+            except Exception as e:
+                db.session.rollback()
+                app_logger.log_error("Export job failed", exception=e, context=f"job {job_id}")
+                _finish_job(job_id, status="failed", error=EXPORT_FAILED_MESSAGE)
+        finally:
+            _disown(job_id)
+            db.session.remove()
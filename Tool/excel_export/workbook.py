@@ -0,0 +1,80 @@
+from openpyxl import Workbook
+from app.db import db
+from app.models import Product
+
+
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+EXPORT_BATCH_SIZE = 1000
+
+PRODUCT_HEADER = [
+    "Product Name",
+    "Selling Price",
+    "Amount Spent",
+    "Initial Stock",
+    "Remaining Stock",
+    "Reorder Point",
+    "Expiration Date",
+    "Supplier Info",
+    "Date Created",
+    "Status"
+]
+
+
+def product_export_query(user_id, status=None):
+    # plain column tuples, no ORM objects to build or track per row
+    query = (
+        db.session.query(
+            Product.product_name,
+            Product.selling_price,
+            Product.amount_spent,
+            Product.initial_stock,
+            Product.remaining_stock,
+            Product.reorder_point,
+            Product.expiration_date,
+            Product.supplier_info,
+            Product.created_at,
+            Product.status)
+        .filter(Product.user_id == user_id)
+        .order_by(Product.id)
+    )
+    if status:
+        query = query.filter(Product.status == status)
+    return query
+
+
+def product_row(row):
+    return [
+        row.product_name,
+        row.selling_price,
+        row.amount_spent,
+        row.initial_stock,
+        row.remaining_stock,
+        row.reorder_point,
+        row.expiration_date.strftime("%Y-%m-%d") if row.expiration_date else "",
+        row.supplier_info or "",
+        row.created_at.strftime("%Y-%m-%d") if row.created_at else "",
+        row.status or ""
+    ]
+
+
+def write_products(query, output, batch_size=EXPORT_BATCH_SIZE, progress=None):
+    """Write the rows of `query` as a products sheet into the file object `output`.
+
+    The workbook is write-only, so each row goes straight to a temporary
+    file on disk, and the query is read batch_size rows at a time; memory
+    stays flat however many products there are. progress(rows written) is
+    called after every batch. Returns the row count.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Products")
+    sheet.append(PRODUCT_HEADER)
+
+    count = 0
+    for row in query.yield_per(batch_size):
+        sheet.append(product_row(row))
+        count += 1
+        if progress and count % batch_size == 0:
+            progress(count)
+
+    workbook.save(output)
+    return count
@@ -1,9 +1,13 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.db import db
-from app.models import User, Spent
+from app.db import db, cache
+from app.models import Spent
+from app.identity import current_user_id
+from app.pagination import page_or_all, first_page, list_response, InvalidCursor
+from app.periods import period_conditions, period_from_args, InvalidPeriod
+from app.streaming import wants_stream, stream_json_array
+from app.versions import bump_data_version, data_version
 from sqlalchemy import extract, func, desc
-from datetime import datetime
 
 
 expenses =  Blueprint('expenses', '__name__')
@@ -12,11 +16,9 @@ expenses =  Blueprint('expenses', '__name__')
 @jwt_required()
 def track():
 
-    current_email = get_jwt_identity()
-    current_user = User.query.filter_by(
-        email=current_email).first()
+    user_id = current_user_id()
     
-    if not current_user:
+    if not user_id:
         return jsonify({"message": 
                 "user not found"
             }), 400
@@ -30,10 +32,11 @@ def track():
         description=description,
         amount=amount,
         category=category,
-        user_id=current_user.id
+        user_id=user_id
     )
 
     db.session.add(new_expense)
+    bump_data_version(user_id)
     db.session.commit()
     return jsonify({"message":
             "expenses added successfully"
@@ -44,24 +47,43 @@ def track():
 @expenses.route('/track/all', methods=['GET', 'POST'])
 @jwt_required()
 def get_expenses():
-    current_email = get_jwt_identity()
-    current_user = User.query.filter_by(
-        email=current_email).first()
-
-    expenses = Spent.query.filter_by(
-        user_id=current_user.id).order_by(
-            Spent.date.desc()).all()
-   
-    result = []
-    for e in expenses:
-        result.append({
+    user_id = current_user_id()
+
+    def expense_item(e):
+        return {
             "description": e.description,
             "amount": float(e.amount),
             "category": e.category,
             "date": e.date
-        })
-    
-    return jsonify(result), 200
+        }
+
+    # ?stream=true sends every expense as it is read
+    if wants_stream(request.args):
+        return stream_json_array(
+            Spent.query.filter_by(user_id=user_id)
+            .order_by(Spent.date.desc(), Spent.id.desc()),
+            expense_item
+        )
+
+    # newest first; with ?limit= or ?cursor= one page at a time, the
+    # paging details go in the headers
+    try:
+        expenses, next_cursor = page_or_all(
+            Spent.query.filter_by(user_id=user_id),
+            (Spent.date, Spent.id),
+            key=lambda row: (row.date, row.id),
+            args=request.args
+        )
+    except InvalidCursor as e:
+        return jsonify({"message": str(e)}), 400
+
+    total = None
+    if first_page(request.args):
+        total = db.session.query(func.count(Spent.id)).filter(Spent.user_id == user_id).scalar()
+
+    result = [expense_item(e) for e in expenses]
+
+    return list_response(result, next_cursor, total), 200
 
 
 
@@ -70,51 +92,57 @@ def get_expenses():
 def expense_summary():
     try:
         current_email = get_jwt_identity()
-        current_user = User.query.filter_by(email=current_email).first()
+        user_id = current_user_id()
 
-        if not current_user:
+        if not user_id:
             return jsonify({"status": "error", "message": "User not found"}), 404
 
+        version = data_version(user_id)
+        cached = cache.response(user_id, version, "expense_summary")
+        if cached is not None:
+            return cached, 200
+
         # Get filters
         date_str = request.args.get("date")
         year = request.args.get("year", type=int)
         month = request.args.get("month", type=int)
 
-        # If date provided, extract year/month
-        if date_str:
-            try:
-                parsed_date = datetime.strptime(date_str, "%Y-%m-%d")
-                year = parsed_date.year
-                month = parsed_date.month
-            except ValueError:
-                return jsonify({"status": "error", "message": "Invalid date format. Use YYYY-MM-DD."}), 400
+        # date (its month), from/to or year/month become a range on Spent.date
+        try:
+            period = period_conditions(Spent.date, request.args)
+            if date_str:
+                # report the month ?date= resolved to, as filter_used always has
+                start, _ = period_from_args(request.args)
+                year, month = start.year, start.month
+        except InvalidPeriod as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
 
         # Query for summary
         summary_query = (
             db.session.query(
                 extract('year', Spent.date).label('year'),
                 extract('month', Spent.date).label('month'),
-                func.sum(Spent.amount).label('total_expenses')
+                func.sum(Spent.amount).label('total_expenses'),
+                func.count(Spent.id).label('expense_count')
             )
-            .filter(Spent.user_id == current_user.id)
+            .filter(Spent.user_id == user_id, *period)
         )
 
-        if year:
-            summary_query = summary_query.filter(extract('year', Spent.date) == year)
-        if month:
-            summary_query = summary_query.filter(extract('month', Spent.date) == month)
-
         summary_query = summary_query.group_by('year', 'month').order_by(desc('year'), desc('month'))
         summary_results = summary_query.all()
 
         # Query for detailed transactions
-        transactions_query = Spent.query.filter_by(user_id=current_user.id)
-        if year:
-            transactions_query = transactions_query.filter(extract('year', Spent.date) == year)
-        if month:
-            transactions_query = transactions_query.filter(extract('month', Spent.date) == month)
-
-        transactions = transactions_query.order_by(desc(Spent.date)).all()
+        transactions_query = Spent.query.filter(Spent.user_id == user_id, *period)
+
+        try:
+            transactions, next_cursor = page_or_all(
+                transactions_query,
+                (Spent.date, Spent.id),
+                key=lambda row: (row.date, row.id),
+                args=request.args
+            )
+        except InvalidCursor as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
 
         if not summary_results:
             return jsonify({
@@ -142,13 +170,22 @@ def expense_summary():
             } for exp in transactions
         ]
 
-        return jsonify({
+        return cache.save_response(user_id, version, "expense_summary", jsonify({
             "status": "success",
-            "filter_used": {"date": date_str, "year": year, "month": month},
+            "filter_used": {
+                "date": date_str,
+                "year": year,
+                "month": month,
+                "from": request.args.get("from"),
+                "to": request.args.get("to")
+            },
             "monthly_expense_summary": summary,
             "expenses_history": history,
+            "next_cursor": next_cursor,
+            # the monthly summary already counted the filtered rows
+            "total": sum(r.expense_count for r in summary_results),
             "user": current_email
-        }), 200
+        })), 200
 
     except Exception as e:
         db.session.rollback()
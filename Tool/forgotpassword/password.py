@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from app.models import User
 from app.db import db
+from app.identity import forget_user, revoke_tokens
 from datetime import datetime, timedelta
 import resend
 import secrets
@@ -30,6 +31,7 @@ def forgot_password():
     user.reset_token = token
     user.reset_expires = expires_at
     db.session.commit()
+    forget_user(user)
 
     #this is why the frontend testing forgot password is not working
     reset_link = f"https://nkwabiz.com/reset-password?token={token}"
@@ -75,6 +77,8 @@ def reset_password():
     user.password = generate_password_hash(password)
     user.reset_token = None
     user.reset_expires = None
+    revoke_tokens(user)
     db.session.commit()
+    forget_user(user)
 
     return jsonify({"message": "Password successfully reset"}), 200
@@ -0,0 +1,32 @@
+"""add user token_version
+
+Revision ID: 153b59dd4267
+Revises: 
+Create Date: 2026-10-18 07:44:45.841856
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '153b59dd4267'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # app.main runs db.create_all(), so a fresh database already has the column
+    columns = [c["name"] for c in sa.inspect(op.get_bind()).get_columns("user")]
+    if "token_version" in columns:
+        return
+
+    with op.batch_alter_table("user") as batch_op:
+        batch_op.add_column(
+            sa.Column("token_version", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade():
+    with op.batch_alter_table("user") as batch_op:
+        batch_op.drop_column("token_version")
@@ -0,0 +1,215 @@
+"""typed product expiration date
+
+Revision ID: 20be4ba32680
+Revises: f3ee9dc2b64b
+Create Date: 2026-10-18 08:00:39.134253
+
+"""
+import logging
+import re
+from datetime import date
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20be4ba32680'
+down_revision = 'f3ee9dc2b64b'
+branch_labels = None
+depends_on = None
+
+
+logger = logging.getLogger("alembic.env")
+
+# the free text is kept here, so nothing the shops typed is lost even
+# where it couldn't be read as a date
+BACKUP = "expiration_date_text"
+BATCH = 1000
+
+# 2025-03-04 or 2025/03/04, and d/m/Y or m/d/Y with / - or . between
+# the fields, anything after the date (a time) is ignored
+ISO_DATE = re.compile(r"(\d{4})[-/](\d{1,2})[-/](\d{1,2})(?!\d)")
+NUMERIC_DATE = re.compile(r"(\d{1,2})[-/.](\d{1,2})[-/.](\d{4}|\d{2})(?!\d)")
+
+INDEXES = [
+    ("ix_product_user_expiration", ["user_id", "expiration_date"]),
+    ("ix_product_status_expiration", ["status", "expiration_date"]),
+]
+
+
+def _date(year, month, day):
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def order_hint(value):
+    # "day" when only day first reads it (25/12/2025), "month" for 12/25/2025
+    match = NUMERIC_DATE.match((value or "").strip())
+    if not match:
+        return None
+    first, second = int(match.group(1)), int(match.group(2))
+    if first > 12 >= second:
+        return "day"
+    if second > 12 >= first:
+        return "month"
+    return None
+
+
+def is_ambiguous(value):
+    # 03/04/2025 is the 3rd of April day first and the 4th of March month first
+    match = NUMERIC_DATE.match((value or "").strip())
+    if not match:
+        return False
+    first, second = int(match.group(1)), int(match.group(2))
+    return first != second and first <= 12 and second <= 12
+
+
+def parse(value, day_first=True):
+    text = (value or "").strip()
+    match = ISO_DATE.match(text)
+    if match:
+        year, month, day = map(int, match.groups())
+        return _date(year, month, day)
+
+    match = NUMERIC_DATE.match(text)
+    if match:
+        first, second, year = match.groups()
+        year = int(year) + (2000 if len(year) == 2 else 0)
+        day, month = (int(first), int(second)) if day_first else (int(second), int(first))
+        return _date(year, month, day)
+    return None
+
+
+def _rows(bind, columns, where):
+    # walk the table by id so a big catalog isn't loaded in one go
+    last_id = 0
+    while True:
+        rows = bind.execute(sa.text(
+            f"SELECT id, {columns} FROM product WHERE id > :last_id "
+            f"AND {where} ORDER BY id LIMIT {BATCH}"
+        ), {"last_id": last_id}).fetchall()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def _tenant_orders(bind):
+    """Which field order each tenant writes dates in.
+
+    Day first unless a tenant's dates only ever read month first; tenants
+    whose dates go both ways are "mixed" and their ambiguous dates stay unread.
+    """
+    hints = {}
+    for rows in _rows(bind, "user_id, expiration_date", "expiration_date IS NOT NULL"):
+        for _, user_id, value in rows:
+            hint = order_hint(value)
+            if hint:
+                hints.setdefault(user_id, set()).add(hint)
+    orders = {}
+    for user_id, seen in hints.items():
+        orders[user_id] = "mixed" if len(seen) > 1 else seen.pop()
+    return orders
+
+
+def _columns():
+    return {c["name"]: c["type"] for c in sa.inspect(op.get_bind()).get_columns("product")}
+
+
+def _existing_indexes():
+    return {i["name"] for i in sa.inspect(op.get_bind()).get_indexes("product")}
+
+
+def _convert(bind, orders):
+    unread = []
+    for rows in _rows(bind, "user_id, expiration_date", "expiration_date IS NOT NULL"):
+        updates = []
+        for product_id, user_id, value in rows:
+            if not value.strip():
+                continue
+            order = orders.get(user_id, "day")
+            if order == "mixed":
+                # each date read the only way it can be, 03/04 can't be
+                order = order_hint(value) or ("unknown" if is_ambiguous(value) else "day")
+            converted = None if order == "unknown" else parse(value, day_first=order != "month")
+            if converted is None:
+                unread.append((product_id, user_id, value))
+            else:
+                updates.append({"id": product_id, "value": converted})
+        if updates:
+            bind.execute(sa.text(
+                "UPDATE product SET expiration_date_new = :value WHERE id = :id"), updates)
+    return unread
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    # db.create_all() already makes it a DATE on a fresh database
+    if not isinstance(_columns()["expiration_date"], sa.Date):
+        with op.batch_alter_table("product") as batch_op:
+            batch_op.add_column(sa.Column("expiration_date_new", sa.Date(), nullable=True))
+
+        orders = _tenant_orders(bind)
+        for user_id, order in orders.items():
+            if order != "day":
+                logger.info(f"user {user_id}: expiration dates read as {order}")
+
+        unread = _convert(bind, orders)
+        for product_id, user_id, value in unread:
+            logger.warning(
+                f"product {product_id} (user {user_id}): could not read expiration "
+                f"date {value!r}, left empty, the text is kept in product.{BACKUP}")
+
+        # the old column stays as the backup rather than being dropped
+        with op.batch_alter_table("product") as batch_op:
+            batch_op.alter_column(
+                "expiration_date",
+                new_column_name=BACKUP,
+                existing_type=sa.String(250),
+                existing_nullable=True)
+            batch_op.alter_column(
+                "expiration_date_new",
+                new_column_name="expiration_date",
+                existing_type=sa.Date(),
+                existing_nullable=True)
+
+    existing = _existing_indexes()
+    for name, columns in INDEXES:
+        if name not in existing:
+            op.create_index(name, "product", columns)
+
+
+def downgrade():
+    bind = op.get_bind()
+    existing = _existing_indexes()
+    for name, columns in reversed(INDEXES):
+        if name in existing:
+            op.drop_index(name, table_name="product")
+
+    with op.batch_alter_table("product") as batch_op:
+        batch_op.add_column(sa.Column("expiration_date_old", sa.String(250), nullable=True))
+
+    for rows in _rows(bind, "expiration_date", "expiration_date IS NOT NULL"):
+        bind.execute(
+            sa.text("UPDATE product SET expiration_date_old = :value WHERE id = :id"),
+            [{"id": product_id, "value": str(value)[:10]} for product_id, value in rows])
+
+    # dates that were never read go back as they were typed
+    has_backup = BACKUP in _columns()
+    if has_backup:
+        bind.execute(sa.text(
+            f"UPDATE product SET expiration_date_old = {BACKUP} "
+            f"WHERE expiration_date IS NULL AND {BACKUP} IS NOT NULL"))
+
+    with op.batch_alter_table("product") as batch_op:
+        batch_op.drop_column("expiration_date")
+        if has_backup:
+            batch_op.drop_column(BACKUP)
+        batch_op.alter_column(
+            "expiration_date_old",
+            new_column_name="expiration_date",
+            existing_type=sa.String(250),
+            existing_nullable=True)
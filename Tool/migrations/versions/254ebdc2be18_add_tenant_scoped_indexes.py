@@ -0,0 +1,44 @@
+"""add tenant scoped indexes
+
+Revision ID: 254ebdc2be18
+Revises: 153b59dd4267
+Create Date: 2026-10-18 07:45:17.016821
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '254ebdc2be18'
+down_revision = '153b59dd4267'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ("ix_product_user_status", "product", ["user_id", "status"]),
+    ("ix_sales_history_product_created", "sales_history", ["product_id", "created_at"]),
+    ("ix_spent_user_date", "spent", ["user_id", "date"]),
+    ("ix_sms_history_user_created", "sms_history", ["user_id", "created_at"]),
+    ("ix_sm_scontacts_user_id", "sm_scontacts", ["user_id"]),
+    ("ix_services_user_id", "services", ["user_id"]),
+    ("ix_user_reset_token", "user", ["reset_token"]),
+]
+
+
+def _existing_indexes(table):
+    return {i["name"] for i in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    # db.create_all() already builds these on a fresh database
+    for name, table, columns in INDEXES:
+        if name not in _existing_indexes(table):
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, columns in reversed(INDEXES):
+        if name in _existing_indexes(table):
+            op.drop_index(name, table_name=table)
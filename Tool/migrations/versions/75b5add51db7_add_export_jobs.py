@@ -0,0 +1,60 @@
+"""add export jobs
+
+Revision ID: 75b5add51db7
+Revises: 20be4ba32680
+Create Date: 2026-10-18 08:07:46.844372
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '75b5add51db7'
+down_revision = '20be4ba32680'
+branch_labels = None
+depends_on = None
+
+
+def _create_jobs():
+    op.create_table(
+        "export_job",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("user.id"), nullable=False),
+        sa.Column("kind", sa.String(30), nullable=False),
+        sa.Column("params", sa.JSON(), nullable=True),
+        sa.Column("active_key", sa.String(64), nullable=True),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("rows_done", sa.Integer(), nullable=False),
+        sa.Column("rows_total", sa.Integer(), nullable=True),
+        sa.Column("file_size", sa.BigInteger(), nullable=True),
+        sa.Column("error", sa.String(500), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id", "active_key", name="uq_export_job_active")
+    )
+    op.create_index("ix_export_job_user_id", "export_job", ["user_id"])
+
+
+def upgrade():
+    # background exports started from POST /excel_export/jobs
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("export_job"):
+        _create_jobs()
+    if not inspector.has_table("export_chunk"):
+        op.create_table(
+            "export_chunk",
+            sa.Column("job_id", sa.Integer(),
+                      sa.ForeignKey("export_job.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("seq", sa.Integer(), nullable=False),
+            # MEDIUMBLOB on MySQL
+            sa.Column("data", sa.LargeBinary(length=(2 ** 24) - 1), nullable=False),
+            sa.PrimaryKeyConstraint("job_id", "seq")
+        )
+
+
+def downgrade():
+    op.drop_table("export_chunk")
+    op.drop_table("export_job")
@@ -0,0 +1,40 @@
+"""add product fulltext index
+
+Revision ID: 7db14fe95e95
+Revises: 92673952a6f4
+Create Date: 2026-10-18 07:57:22.350522
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7db14fe95e95'
+down_revision = '92673952a6f4'
+branch_labels = None
+depends_on = None
+
+
+def _has_index():
+    indexes = sa.inspect(op.get_bind()).get_indexes("product")
+    return any(index["name"] == "ft_product_search" for index in indexes)
+
+
+def upgrade():
+    # MySQL only; the ngram parser matches inside words, which suits
+    # short product names and names without spaces
+    if op.get_bind().dialect.name != "mysql" or _has_index():
+        return
+
+    op.execute(
+        "ALTER TABLE product ADD FULLTEXT INDEX ft_product_search "
+        "(product_name, supplier_info) WITH PARSER ngram"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "mysql" or not _has_index():
+        return
+
+    op.drop_index("ft_product_search", table_name="product")
@@ -0,0 +1,49 @@
+"""unique product name per tenant
+
+Revision ID: 8bcb0bbb6025
+Revises: 254ebdc2be18
+Create Date: 2026-10-18 07:46:03.695577
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8bcb0bbb6025'
+down_revision = '254ebdc2be18'
+branch_labels = None
+depends_on = None
+
+
+NAME = "uq_product_user_name"
+
+
+def _exists(bind):
+    inspector = sa.inspect(bind)
+    names = {c["name"] for c in inspector.get_unique_constraints("product")}
+    names |= {i["name"] for i in inspector.get_indexes("product")}
+    return NAME in names
+
+
+def upgrade():
+    bind = op.get_bind()
+    if _exists(bind):
+        return
+
+    duplicates = bind.execute(sa.text(
+        "SELECT user_id, product_name, COUNT(*) FROM product "
+        "GROUP BY user_id, product_name HAVING COUNT(*) > 1"
+    )).fetchall()
+    if duplicates:
+        listing = ", ".join(f"user {u}: {name!r} x{n}" for u, name, n in duplicates)
+        raise RuntimeError(
+            f"rename or merge duplicate products before upgrading ({listing})")
+
+    with op.batch_alter_table("product") as batch_op:
+        batch_op.create_unique_constraint(NAME, ["user_id", "product_name"])
+
+
+def downgrade():
+    with op.batch_alter_table("product") as batch_op:
+        batch_op.drop_constraint(NAME, type_="unique")
@@ -0,0 +1,41 @@
+"""add reorder suggestions
+
+Revision ID: 92673952a6f4
+Revises: c0179617ee66
+Create Date: 2026-10-18 07:55:02.788104
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '92673952a6f4'
+down_revision = 'c0179617ee66'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # filled by `flask forecast-reorder`
+    if sa.inspect(op.get_bind()).has_table("reorder_suggestion"):
+        return
+
+    op.create_table(
+        "reorder_suggestion",
+        sa.Column("product_id", sa.Integer(),
+                  sa.ForeignKey("product.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("user.id"), nullable=False),
+        sa.Column("demand_rate", sa.Numeric(12, 3), nullable=False),
+        sa.Column("forecast", sa.Numeric(12, 3), nullable=False),
+        sa.Column("days_of_cover", sa.Numeric(12, 1), nullable=True),
+        sa.Column("reorder_point", sa.Integer(), nullable=False),
+        sa.Column("order_quantity", sa.Integer(), nullable=False),
+        sa.Column("computed_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("product_id")
+    )
+    op.create_index("ix_reorder_suggestion_user_id", "reorder_suggestion", ["user_id"])
+
+
+def downgrade():
+    op.drop_table("reorder_suggestion")
@@ -0,0 +1,33 @@
+"""add low stock index
+
+Revision ID: c0179617ee66
+Revises: c053175f5d1e
+Create Date: 2026-10-18 07:52:21.383811
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c0179617ee66'
+down_revision = 'c053175f5d1e'
+branch_labels = None
+depends_on = None
+
+
+def _existing_indexes(table):
+    return {i["name"] for i in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    # db.create_all() already builds it on a fresh database
+    if "ix_product_user_stock" not in _existing_indexes("product"):
+        op.create_index(
+            "ix_product_user_stock", "product",
+            ["user_id", "remaining_stock", "reorder_point"])
+
+
+def downgrade():
+    if "ix_product_user_stock" in _existing_indexes("product"):
+        op.drop_index("ix_product_user_stock", table_name="product")
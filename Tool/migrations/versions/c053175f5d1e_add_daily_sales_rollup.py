@@ -0,0 +1,38 @@
+"""add daily sales rollup
+
+Revision ID: c053175f5d1e
+Revises: 8bcb0bbb6025
+Create Date: 2026-10-18 07:48:35.014131
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c053175f5d1e'
+down_revision = '8bcb0bbb6025'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # fill it afterwards with `flask rollup-backfill`
+    if sa.inspect(op.get_bind()).has_table("daily_sales_rollup"):
+        return
+
+    op.create_table(
+        "daily_sales_rollup",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("user.id"), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("product_id", sa.Integer(),
+                  sa.ForeignKey("product.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("qty", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.Numeric(12, 2), nullable=False),
+        sa.Column("profit", sa.Numeric(12, 2), nullable=False),
+        sa.PrimaryKeyConstraint("user_id", "day", "product_id")
+    )
+
+
+def downgrade():
+    op.drop_table("daily_sales_rollup")
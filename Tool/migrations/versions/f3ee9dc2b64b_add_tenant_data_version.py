@@ -0,0 +1,33 @@
+"""add tenant data version
+
+Revision ID: f3ee9dc2b64b
+Revises: 7db14fe95e95
+Create Date: 2026-10-18 07:59:17.560496
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3ee9dc2b64b'
+down_revision = '7db14fe95e95'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # rows appear on each tenant's first write
+    if sa.inspect(op.get_bind()).has_table("tenant_data_version"):
+        return
+
+    op.create_table(
+        "tenant_data_version",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("user.id"), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id")
+    )
+
+
+def downgrade():
+    op.drop_table("tenant_data_version")
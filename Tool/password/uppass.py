@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify
 from werkzeug.security import generate_password_hash, check_password_hash
-from app.models import User
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.identity import load_current_user, forget_user, revoke_tokens, user_claims
+from flask_jwt_extended import jwt_required, get_jwt_identity, create_access_token
 from app.db import db
 password = Blueprint('password', __name__)
 
@@ -11,9 +11,8 @@ def update_password():
 
     try:
         current_email = get_jwt_identity()
-        current_user = User.query.filter_by(
-            email=current_email
-        ).first()
+        # locked row: the password hash and token version are read and changed
+        current_user = load_current_user(for_update=True)
 
         if not current_user:
             return jsonify({
@@ -48,9 +47,19 @@ def update_password():
         hashed_password = generate_password_hash(new_password)
         current_user.password = hashed_password
 
+        # log out every other session, this one gets a fresh token
+        revoke_tokens(current_user)
+
         db.session.commit()
+        forget_user(current_user)
+
+        access_token = create_access_token(
+            identity=current_email, additional_claims=user_claims(current_user))
 
-        return jsonify({"message": "Password updated successfully"})
+        return jsonify({
+            "message": "Password updated successfully",
+            "access_token": access_token
+        })
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -1,6 +1,8 @@
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import get_jwt_identity, jwt_required
+from flask_jwt_extended import jwt_required
 from app.models import User, Payment
+from app.identity import get_current_user, load_current_user, forget_user
+from app.versions import bump_data_version
 from app.db import db 
 from datetime import datetime
 import requests
@@ -77,8 +79,7 @@ def get_bundles():
 @payment.route('/initialize-payment', methods=['POST'])
 @jwt_required()
 def initialize_payment():
-    current_email = get_jwt_identity()
-    current_user = User.query.filter_by(email=current_email).first()
+    current_user = get_current_user()
     
     if not current_user:
         return jsonify({"message": "User not found"}), 400
@@ -162,8 +163,8 @@ def initialize_payment():
 @payment.route('/verify_payment/<reference>', methods=['GET'])
 @jwt_required()
 def verify_payment(reference):
-    current_email = get_jwt_identity()
-    current_user = User.query.filter_by(email=current_email).first()
+    # fresh row, the webhook may have just credited the bundle
+    current_user = load_current_user()
 
     if not current_user:
         return jsonify({"message": "User not found"}), 404
@@ -276,6 +277,7 @@ def paystack_webhook():
             if user:
                 current_sms_balance = int(user.sms_balance or 0)
                 user.sms_balance = current_sms_balance + bundle["sms_credits"]
+                bump_data_version(user.id)
                 
                 # Optional: Track your costs and leftovers separately
                 # (This is for your accounting, not given to user)
@@ -283,7 +285,8 @@ def paystack_webhook():
 
            
             db.session.commit()
-
+            if user:
+                forget_user(user)
             
            
            
@@ -0,0 +1,276 @@
+import os
+import re
+from bisect import bisect_left
+from difflib import get_close_matches
+from flask import current_app
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.exc import OperationalError
+from app.db import db
+from app.models import Product
+from app.cache import TTLCache
+
+
+# Per-worker map of tenant -> {product name: product id}. Product writes
+# call invalidate_catalog(); other workers fall back to the database when
+# a cached entry turns out to be missing or stale.
+_name_index = TTLCache(
+    maxsize=int(os.getenv("CATALOG_CACHE_SIZE", 1024)),
+    ttl=int(os.getenv("CATALOG_CACHE_TTL", 300))
+)
+
+# Per-worker typeahead index of tenant -> sorted [(word, name, product id)]
+# over active products plus the typo vocabulary, see _build_prefix_index().
+# Built on first use and dropped with the name map.
+_prefix_index = TTLCache(
+    maxsize=int(os.getenv("CATALOG_CACHE_SIZE", 1024)),
+    ttl=int(os.getenv("CATALOG_CACHE_TTL", 300))
+)
+
+TYPO_CUTOFF = 0.7
+# difflib's ratio is at most 2 * shorter / (len(a) + len(b)), so words
+# outside this length band can never reach TYPO_CUTOFF
+TYPO_LENGTH_BAND = (TYPO_CUTOFF / (2 - TYPO_CUTOFF), (2 - TYPO_CUTOFF) / TYPO_CUTOFF)
+
+
+def _name_key(product_name):
+    # MySQL compares product names case-insensitively and ignores trailing spaces
+    return product_name.strip().lower()
+
+
+def product_id_for_name(user_id, product_name):
+    names = _name_index.get(user_id)
+    if names is None:
+        rows = (
+            db.session.query(Product.product_name, Product.id)
+            .filter(Product.user_id == user_id)
+            .all()
+        )
+        names = {_name_key(name): product_id for name, product_id in rows}
+        _name_index.set(user_id, names)
+
+    return names.get(_name_key(product_name))
+
+
+def get_tenant_product(user_id, product_id=None, product_name=None):
+    """Find one of the tenant's products by id, or by name through the cached name map."""
+    if product_id is not None:
+        return Product.query.filter_by(id=product_id, user_id=user_id).first()
+
+    if not product_name:
+        return None
+
+    cached_id = product_id_for_name(user_id, product_name)
+    if cached_id is not None:
+        product = Product.query.filter_by(id=cached_id, user_id=user_id).first()
+        if product and _name_key(product.product_name) == _name_key(product_name):
+            return product
+
+    product = Product.query.filter_by(user_id=user_id, product_name=product_name).first()
+    if product or cached_id is not None:
+        # created or renamed in another worker, reload the map next time
+        invalidate_catalog(user_id)
+    return product
+
+
+def get_tenant_products(user_id, product_ids=(), product_names=()):
+    """Resolve many of the tenant's products with at most two IN queries.
+
+    Returns ({product id: product}, {requested name: product}).
+    """
+    wanted = set(product_ids)
+    cached_ids = {}
+    for name in product_names:
+        cached_id = product_id_for_name(user_id, name)
+        if cached_id is not None:
+            cached_ids[name] = cached_id
+            wanted.add(cached_id)
+
+    by_id = {}
+    if wanted:
+        products = Product.query.filter(
+            Product.user_id == user_id, Product.id.in_(wanted)).all()
+        by_id = {product.id: product for product in products}
+
+    by_name = {}
+    for name, cached_id in cached_ids.items():
+        product = by_id.get(cached_id)
+        if product and _name_key(product.product_name) == _name_key(name):
+            by_name[name] = product
+
+    missing = [name for name in product_names if name not in by_name]
+    if missing:
+        products = Product.query.filter(
+            Product.user_id == user_id, Product.product_name.in_(missing)).all()
+        if products or any(name in cached_ids for name in missing):
+            invalidate_catalog(user_id)
+
+        found = {_name_key(product.product_name): product for product in products}
+        for name in missing:
+            product = found.get(_name_key(name))
+            if product:
+                by_name[name] = product
+                by_id.setdefault(product.id, product)
+
+    return by_id, by_name
+
+
+def owned_product_ids(user_id, product_ids):
+    """The subset of product_ids that belong to the tenant, in one query."""
+    if not product_ids:
+        return set()
+    rows = (
+        db.session.query(Product.id)
+        .filter(Product.user_id == user_id, Product.id.in_(product_ids))
+        .all()
+    )
+    return {row.id for row in rows}
+
+
+def name_taken(user_id, product_name, exclude_id=None):
+    query = Product.query.filter_by(user_id=user_id, product_name=product_name)
+    if exclude_id is not None:
+        query = query.filter(Product.id != exclude_id)
+    return db.session.query(query.exists()).scalar()
+
+
+def _build_prefix_index(rows):
+    # the whole name and each word in it, so "soap" finds "Key Soap"
+    entries = sorted(
+        (word, name, product_id)
+        for product_id, name in rows
+        for word in {_name_key(name)} | set(_name_key(name).split())
+    )
+
+    # typo vocabulary: word -> its products, and the words bucketed by
+    # first letter, each bucket sorted by length for the length band
+    words = {}
+    for word, name, product_id in entries:
+        words.setdefault(word, []).append((product_id, name))
+    initials = {}
+    for word in words:
+        initials.setdefault(word[0], []).append((len(word), word))
+    for bucket in initials.values():
+        bucket.sort()
+
+    return {"entries": entries, "words": words, "initials": initials}
+
+
+def _prefix_entries(user_id):
+    index = _prefix_index.get(user_id)
+    if index is None:
+        rows = (
+            db.session.query(Product.id, Product.product_name)
+            .filter(Product.user_id == user_id, Product.status == "active")
+            .all()
+        )
+        index = _build_prefix_index(rows)
+        _prefix_index.set(user_id, index)
+    return index
+
+
+def _typo_candidates(index, term):
+    # typos rarely hit the first letter: only same-initial words of a
+    # length that could still reach the cutoff go to difflib
+    bucket = index["initials"].get(term[0], [])
+    low, high = TYPO_LENGTH_BAND
+    start = bisect_left(bucket, (int(len(term) * low),))
+    end = bisect_left(bucket, (int(len(term) * high) + 1,))
+    return [word for _, word in bucket[start:end]]
+
+
+def typeahead(user_id, term, limit=10):
+    """Ids of active products whose name, or a word of it, starts with `term`.
+
+    Names that start with the term rank first. When nothing matches, words
+    spelled close to the term are tried, so small typos still find products.
+    """
+    index = _prefix_entries(user_id)
+    entries = index["entries"]
+    prefix = _name_key(term)
+    if not prefix:
+        return []
+
+    matches = {}
+    i = bisect_left(entries, (prefix,))
+    while i < len(entries) and entries[i][0].startswith(prefix):
+        word, name, product_id = entries[i]
+        matches[product_id] = (not _name_key(name).startswith(prefix), _name_key(name))
+        i += 1
+
+    if not matches:
+        candidates = _typo_candidates(index, prefix)
+        for word in get_close_matches(prefix, candidates, n=limit, cutoff=TYPO_CUTOFF):
+            for product_id, name in index["words"][word]:
+                matches.setdefault(product_id, (True, _name_key(name)))
+
+    return sorted(matches, key=matches.get)[:limit]
+
+
+def _boolean_terms(term):
+    # every word must match, as a prefix; drops boolean-mode operators
+    return " ".join(f"+{word}*" for word in re.findall(r"\w+", term))
+
+
+# MySQL's "Can't find FULLTEXT index matching the column list"
+MISSING_FULLTEXT_INDEX = 1191
+
+
+def _is_missing_fulltext(error):
+    args = getattr(error.orig, "args", ())
+    return bool(args) and args[0] == MISSING_FULLTEXT_INDEX
+
+
+def _like_search(query, term, limit):
+    return (
+        query.filter(Product.product_name.icontains(term, autoescape=True))
+        .order_by(Product.product_name)
+        .limit(limit)
+        .all()
+    )
+
+
+def search_products(user_id, term, limit=50):
+    """Search the tenant's products by name and supplier.
+
+    On MySQL this uses the ft_product_search FULLTEXT index, names starting
+    with the term ranking first, and a LIKE on the name where the index is
+    missing. Falls back to close spellings from the typeahead index when
+    nothing matches.
+    """
+    query = Product.query.filter(Product.user_id == user_id)
+
+    if db.session.get_bind().dialect.name == "mysql":
+        terms = _boolean_terms(term)
+        if not terms:
+            return []
+        score = match(Product.product_name, Product.supplier_info, against=terms).in_boolean_mode()
+        try:
+            products = (
+                query.filter(score)
+                .order_by(Product.product_name.startswith(term, autoescape=True).desc(), score.desc())
+                .limit(limit)
+                .all()
+            )
+        except OperationalError as e:
+            if not _is_missing_fulltext(e):
+                raise
+            # a database the 7db14fe95e95 migration never ran on
+            db.session.rollback()
+            current_app.logger.warning("ft_product_search is missing, run flask db upgrade")
+            products = _like_search(query, term, limit)
+    else:
+        products = _like_search(query, term, limit)
+
+    if not products:
+        product_ids = typeahead(user_id, term, limit)
+        if product_ids:
+            found = {product.id: product for product in query.filter(Product.id.in_(product_ids))}
+            products = [found[product_id] for product_id in product_ids if product_id in found]
+
+    return products
+
+
+def invalidate_catalog(user_id):
+    """Forget the tenant's cached product names, call after a product write."""
+    _name_index.delete(user_id)
+    _prefix_index.delete(user_id)
@@ -0,0 +1,171 @@
+import csv
+import io
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from openpyxl import load_workbook
+from app.periods import parse_day, InvalidPeriod
+
+
+REQUIRED_COLUMNS = ("product_name", "selling_price", "amount_spent", "initial_stock")
+OPTIONAL_COLUMNS = ("reorder_point", "expiration_date", "supplier_info")
+
+# what a bulk update may change, renames stay one product at a time
+BULK_UPDATE_COLUMNS = ("selling_price", "amount_spent", "initial_stock") + OPTIONAL_COLUMNS
+
+
+class ImportFileError(ValueError):
+    pass
+
+
+def _column_name(header):
+    return str(header or "").strip().lower().replace(" ", "_")
+
+
+def _rows(header, records):
+    columns = [_column_name(name) for name in header]
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        raise ImportFileError(f"missing columns: {', '.join(missing)}")
+
+    for values in records:
+        # skip blank lines and empty spreadsheet rows
+        if not any(value not in (None, "") for value in values):
+            yield None
+            continue
+        yield dict(zip(columns, values))
+
+
+def read_upload(upload):
+    """Yield (row number, {column: value}) from an uploaded CSV or XLSX file.
+
+    Rows are read one at a time from the upload's stream, so the whole file
+    is never held in memory. Row numbers count the header as row 1.
+    """
+    filename = (upload.filename or "").lower()
+    workbook = None
+
+    if filename.endswith(".csv"):
+        text = io.TextIOWrapper(upload.stream, encoding="utf-8-sig", newline="")
+        records = csv.reader(text)
+    elif filename.endswith(".xlsx"):
+        try:
+            workbook = load_workbook(upload.stream, read_only=True, data_only=True)
+        except Exception:
+            raise ImportFileError("could not read the spreadsheet")
+        records = workbook.active.iter_rows(values_only=True)
+    else:
+        raise ImportFileError("upload a .csv or .xlsx file")
+
+    try:
+        header = next(records, None)
+        if not header:
+            raise ImportFileError("the file is empty")
+
+        for number, row in enumerate(_rows(header, records), start=2):
+            if row is not None:
+                yield number, row
+    except (UnicodeDecodeError, csv.Error):
+        raise ImportFileError("the file could not be read, save it as UTF-8 CSV or XLSX")
+    finally:
+        if workbook is not None:
+            workbook.close()
+
+
+def _text(value):
+    if value is None:
+        return ""
+    return str(value).strip()
+
+
+def _amount(value, name):
+    try:
+        amount = Decimal(_text(value))
+    except InvalidOperation:
+        raise ValueError(f"{name} must be a number")
+    if not amount.is_finite() or amount < 0:
+        raise ValueError(f"{name} must be 0 or more")
+    return amount.quantize(Decimal("0.01"))
+
+
+def _count(value, name):
+    try:
+        number = Decimal(_text(value))
+    except InvalidOperation:
+        raise ValueError(f"{name} must be a whole number")
+    if not number.is_finite() or number != number.to_integral_value() or number < 0:
+        raise ValueError(f"{name} must be a whole number, 0 or more")
+    return int(number)
+
+
+def parse_expiration(value):
+    """A date from a spreadsheet cell or a YYYY-MM-DD string, None when blank."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if not _text(value):
+        return None
+    try:
+        return parse_day(_text(value))
+    except InvalidPeriod:
+        raise ValueError("expiration_date must be a date, YYYY-MM-DD")
+
+
+def parse_product(row):
+    """Validate one imported row into Product column values, raises ValueError."""
+    product_name = _text(row.get("product_name"))
+    if not product_name:
+        raise ValueError("product_name is required")
+    if len(product_name) > 250:
+        raise ValueError("product_name is longer than 250 characters")
+
+    values = {
+        "product_name": product_name,
+        "selling_price": _amount(row.get("selling_price"), "selling_price"),
+        "amount_spent": _amount(row.get("amount_spent"), "amount_spent"),
+        "initial_stock": _count(row.get("initial_stock"), "initial_stock")
+    }
+
+    if _text(row.get("reorder_point")):
+        values["reorder_point"] = _count(row.get("reorder_point"), "reorder_point")
+
+    # optional columns left blank are not set, so they don't wipe
+    # what an existing product already has
+    expiration_date = parse_expiration(row.get("expiration_date"))
+    if expiration_date:
+        values["expiration_date"] = expiration_date
+
+    supplier_info = _text(row.get("supplier_info"))
+    if len(supplier_info) > 1000:
+        raise ValueError("supplier_info is longer than 1000 characters")
+    if supplier_info:
+        values["supplier_info"] = supplier_info
+
+    return values
+
+
+def parse_changes(changes):
+    """Validate a bulk update's {column: value} into Product column values, raises ValueError."""
+    if not isinstance(changes, dict) or not changes:
+        raise ValueError("no changes given")
+
+    unknown = [name for name in changes if name not in BULK_UPDATE_COLUMNS]
+    if "product_name" in unknown:
+        raise ValueError("product_name can't be changed in bulk")
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(sorted(unknown))}")
+
+    values = {}
+    for name, value in changes.items():
+        if name in ("selling_price", "amount_spent"):
+            values[name] = _amount(value, name)
+        elif name in ("initial_stock", "reorder_point"):
+            values[name] = _count(value, name)
+        elif name == "expiration_date":
+            values[name] = parse_expiration(value)
+        elif name == "supplier_info" and len(_text(value)) > 1000:
+            raise ValueError("supplier_info is longer than 1000 characters")
+        else:
+            values[name] = _text(value) or None
+    return values
+
@@ -1,8 +1,19 @@
 from flask import request, Blueprint, jsonify
-from app.models import User, Product, Payment
-from app.db import db , app_logger
+from app.models import Product, Payment
+from app.identity import current_user_id
+from product_view.catalog import (
+    name_taken, invalidate_catalog, search_products, typeahead, owned_product_ids)
+from product_view.importer import (
+    read_upload, parse_product, parse_changes, parse_expiration, ImportFileError, OPTIONAL_COLUMNS)
+from app.streaming import wants_stream, stream_json_object
+from app.upsert import upsert
+from app.pagination import keyset_page, page_size, first_page, InvalidCursor
+from app.versions import bump_data_version, data_etag, not_modified
+from app.db import db , app_logger, events
 from datetime import datetime
 from flask_jwt_extended import get_jwt_identity, jwt_required
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only
 
 
 product_view = Blueprint('product_view', '__name__')
@@ -12,10 +23,9 @@ product_view = Blueprint('product_view', '__name__')
 @jwt_required()
 def start():
     current_email = get_jwt_identity()
-    current_user = User.query.filter_by(
-        email=current_email).first()
+    user_id = current_user_id()
 
-    if not current_user:
+    if not user_id:
         return jsonify({"message":
                  "user not found"}), 400
 
@@ -32,15 +42,24 @@ def start():
         return jsonify({"error": "Invalid data type for one or more fields"}), 400
 
     #post attemp
-    app_logger.product_attempt(current_user, request.remote_addr)
+    app_logger.product_attempt(current_email, request.remote_addr)
 
 
     # Validation
     missing_fields = [f for f in ["product_name", "selling_price", "initial_stock", "amount_spent"] if not data.get(f)]
     if missing_fields:
-        app_logger.product_failure(current_user, reason="missing fields")
+        app_logger.product_failure(current_email, reason="missing fields")
         return jsonify({"message": f"{missing_fields} required"}), 400
-    
+
+    try:
+        expiration_date = parse_expiration(expiration_date)
+    except ValueError as e:
+        app_logger.product_failure(current_email, reason="invalid expiration date")
+        return jsonify({"message": str(e)}), 400
+
+    if name_taken(user_id, product_name):
+        app_logger.product_failure(current_email, reason="duplicate name")
+        return jsonify({"message": f"{product_name} already exists"}), 409
 
 
     save_pro = Product(
@@ -51,27 +70,169 @@ def start():
         remaining_stock=initial_stock,
         expiration_date=expiration_date,
         supplier_info=supplier_info,
-        user_id=current_user.id
+        user_id=user_id
     )
 
-    app_logger.product_success(current_email)
-
     db.session.add(save_pro)
-    db.session.commit()
+    bump_data_version(user_id)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # a concurrent create took the name after name_taken() said it was free
+        db.session.rollback()
+        app_logger.product_failure(current_email, reason="duplicate name")
+        return jsonify({"message": f"{product_name} already exists"}), 409
+
+    app_logger.product_success(current_email)
+    invalidate_catalog(user_id)
+    events.publish(user_id, "products", {"action": "created", "product_ids": [save_pro.id]})
 
     return jsonify({"message":
              "product information saved successfully"}), 200
 
+IMPORT_CHUNK_SIZE = 500
+MAX_IMPORT_ERRORS = 1000
+
+# refreshed on products that already exist, stock levels are left alone
+IMPORT_UPDATE_COLUMNS = ("selling_price", "amount_spent")
+
+
+def save_import_chunk(user_id, chunk):
+    """Upsert one chunk of parsed rows, returns how many were already in the catalog."""
+    existing = (
+        db.session.query(db.func.count(Product.id))
+        .filter(Product.user_id == user_id,
+                Product.product_name.in_([values["product_name"] for values in chunk]))
+        .scalar()
+    )
+
+    # rows with the same optional columns share one statement
+    groups = {}
+    for values in chunk:
+        groups.setdefault(tuple(sorted(values)), []).append({
+            **values,
+            "user_id": user_id,
+            "remaining_stock": values["initial_stock"]
+        })
+
+    for columns, rows in groups.items():
+        upsert(
+            Product,
+            rows,
+            keys=("user_id", "product_name"),
+            update=IMPORT_UPDATE_COLUMNS + tuple(
+                name for name in columns if name in OPTIONAL_COLUMNS)
+        )
+    bump_data_version(user_id)
+    db.session.commit()
+    return existing
+
+
+#route to create or refresh many products from a CSV or XLSX upload
+@product_view.route('/product/import', methods=['POST'])
+@jwt_required()
+def import_products():
+    current_email = get_jwt_identity()
+    user_id = current_user_id()
+
+    if not user_id:
+        return jsonify({"message":
+                 "user not found"}), 400
+
+    upload = request.files.get("file")
+    if not upload:
+        return jsonify({"message": "upload the file in the 'file' field"}), 400
+
+    app_logger.product_attempt(current_email, request.remote_addr)
+
+    processed = created = updated = failed = 0
+    errors = []
+    seen = set()
+    chunk = []
+
+    def reject(number, row, reason):
+        if len(errors) < MAX_IMPORT_ERRORS:
+            errors.append({
+                "row": number,
+                "product_name": row.get("product_name"),
+                "error": reason
+            })
+
+    try:
+        for number, row in read_upload(upload):
+            processed += 1
+            try:
+                values = parse_product(row)
+            except ValueError as e:
+                failed += 1
+                reject(number, row, str(e))
+                continue
+
+            # names compare case-insensitively, like the unique index
+            key = values["product_name"].lower()
+            if key in seen:
+                failed += 1
+                reject(number, row, "product_name appears earlier in this file")
+                continue
+            seen.add(key)
+
+            chunk.append(values)
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                existing = save_import_chunk(user_id, chunk)
+                updated += existing
+                created += len(chunk) - existing
+                chunk = []
+
+        if chunk:
+            existing = save_import_chunk(user_id, chunk)
+            updated += existing
+            created += len(chunk) - existing
+
+    except ImportFileError as e:
+        db.session.rollback()
+        invalidate_catalog(user_id)
+        # chunks before the bad row are already committed
+        if created or updated:
+            events.publish(user_id, "products",
+                           {"action": "imported", "created": created, "updated": updated})
+        app_logger.product_failure(current_email, reason="unreadable import")
+        return jsonify({
+            "message": str(e),
+            "created": created,
+            "updated": updated
+        }), 400
+
+    invalidate_catalog(user_id)
+    if created or updated:
+        events.publish(user_id, "products",
+                       {"action": "imported", "created": created, "updated": updated})
+
+    report = {
+        "message": f"{created + updated} of {processed} rows imported",
+        "processed": processed,
+        "created": created,
+        "updated": updated,
+        "failed": failed,
+        "errors": errors
+    }
+
+    if not created and not updated:
+        app_logger.product_failure(current_email, reason="import rejected")
+        return jsonify(report), 400
+
+    app_logger.product_success(current_email)
+    return jsonify(report), 200
+
+
 #route to update product        
 @product_view.route('/product/<int:product_id>', methods=['PUT'])
 @jwt_required()
 def update_product(product_id):
     try:
-        current_user_email = get_jwt_identity()
-        current_user = User.query.filter_by(
-            email=current_user_email).first()
+        current_email = get_jwt_identity()
+        user_id = current_user_id()
         
-        if not current_user:
+        if not user_id:
             return jsonify({"message":
                  "User not found"}), 404
         
@@ -79,10 +240,10 @@ def update_product(product_id):
         
         product = Product.query.get_or_404(product_id)
 
-        app_logger.product_update_attempt(current_user, request.remote_addr)
+        app_logger.product_update_attempt(current_email, request.remote_addr)
         
         
-        if product.user_id != current_user.id:
+        if product.user_id != user_id:
             return jsonify({"message":
          "Unauthorized to edit this product"}), 403
         
@@ -92,6 +253,8 @@ def update_product(product_id):
         
         # Only update fields that are actually provided and not empty
         if data.get('product_name'):
+            if name_taken(user_id, data['product_name'], exclude_id=product.id):
+                return jsonify({"message": f"{data['product_name']} already exists"}), 409
             product.product_name = data['product_name']
             updated_fields.append('product_name')
             
@@ -109,7 +272,10 @@ def update_product(product_id):
             updated_fields.append('initial_stock')
             
         if data.get('expiration_date'):
-            product.expiration_date = data['expiration_date']
+            try:
+                product.expiration_date = parse_expiration(data['expiration_date'])
+            except ValueError as e:
+                return jsonify({"message": str(e)}), 400
             updated_fields.append('expiration_date')
             
         if data.get('supplier_info'):
@@ -117,12 +283,20 @@ def update_product(product_id):
             updated_fields.append('supplier_info')
         
         if not updated_fields:
-            app_logger.product_failure(current_user, reason="missinf fields")
+            app_logger.product_failure(current_email, reason="missinf fields")
             return jsonify({"message": "No valid fields provided for update"}), 400
         
-        app_logger.product_success(current_user)
-
-        db.session.commit()
+        bump_data_version(user_id)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # a concurrent write took the new name after name_taken() said it was free
+            db.session.rollback()
+            return jsonify({"message": f"{data['product_name']} already exists"}), 409
+
+        app_logger.product_success(current_email)
+        invalidate_catalog(user_id)
+        events.publish(user_id, "products", {"action": "updated", "product_ids": [product.id]})
         
         return jsonify({
             "message": "Product updated successfully",
@@ -132,7 +306,7 @@ def update_product(product_id):
                 "product_name": product.product_name,
                 "selling_price": float(product.selling_price),
                 "initial_stock": product.initial_stock,
-                "expiration_date": product.expiration_date,
+                "expiration_date": product.expiration_date.isoformat() if product.expiration_date else None,
                 "supplier_info": product.supplier_info
             }
         }), 200
@@ -142,6 +316,147 @@ def update_product(product_id):
         return jsonify({"message": f"Update failed: {str(e)}"}), 500
 
 
+MAX_BULK_PRODUCTS = 1000
+
+
+def parse_product_ids(values):
+    """Validate a list of product ids, raises ValueError."""
+    if not isinstance(values, list) or not values:
+        raise ValueError("product_ids must be a non-empty list")
+    if len(values) > MAX_BULK_PRODUCTS:
+        raise ValueError(f"at most {MAX_BULK_PRODUCTS} products per request")
+    if not all(isinstance(value, int) and not isinstance(value, bool) for value in values):
+        raise ValueError("product_ids must be whole numbers")
+    return list(dict.fromkeys(values))
+
+
+#route to change many products in one transaction
+@product_view.route('/products', methods=['PATCH'])
+@jwt_required()
+def update_products():
+    current_email = get_jwt_identity()
+    user_id = current_user_id()
+
+    if not user_id:
+        return jsonify({"message":
+             "User not found"}), 404
+
+    app_logger.product_update_attempt(current_email, request.remote_addr)
+
+    data = request.get_json() or {}
+
+    # either the same changes for every id, or per-product changes:
+    # {"product_ids": [...], "changes": {...}} / {"items": [{"id": 1, ...}]}
+    try:
+        if "items" in data:
+            items = data.get("items")
+            if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+                raise ValueError("items must be a list of objects")
+            product_ids = parse_product_ids([item.get("id") for item in items])
+            if len(product_ids) != len(items):
+                raise ValueError("each product may appear only once")
+            changes = {
+                item["id"]: parse_changes({k: v for k, v in item.items() if k != "id"})
+                for item in items
+            }
+        else:
+            product_ids = parse_product_ids(data.get("product_ids"))
+            shared = parse_changes(data.get("changes"))
+            changes = {product_id: shared for product_id in product_ids}
+    except ValueError as e:
+        app_logger.product_failure(current_email, reason="invalid bulk update")
+        return jsonify({"message": str(e)}), 400
+
+    owned = owned_product_ids(user_id, product_ids)
+    missing = [product_id for product_id in product_ids if product_id not in owned]
+    if missing:
+        app_logger.product_failure(current_email, reason="unknown products")
+        return jsonify({"message": "Products not found", "product_ids": missing}), 404
+
+    # one UPDATE; a column that differs per product becomes a CASE on the id
+    columns = {}
+    for product_id, values in changes.items():
+        for name, value in values.items():
+            columns.setdefault(name, {})[product_id] = value
+
+    assignments = {}
+    for name, by_id in columns.items():
+        column = getattr(Product, name)
+        values = set(by_id.values())
+        if len(by_id) == len(product_ids) and len(values) == 1:
+            assignments[name] = values.pop()
+        else:
+            assignments[name] = db.case(by_id, value=Product.id, else_=column)
+
+    result = db.session.execute(
+        db.update(Product)
+        .where(Product.user_id == user_id, Product.id.in_(product_ids))
+        .values(assignments)
+        .execution_options(synchronize_session=False)
+    )
+    bump_data_version(user_id)
+    db.session.commit()
+    events.publish(user_id, "products", {"action": "updated", "product_ids": product_ids})
+
+    app_logger.product_success(current_email)
+
+    return jsonify({
+        "message": f"{result.rowcount} products updated",
+        "updated": result.rowcount,
+        "updated_fields": sorted(columns)
+    }), 200
+
+
+#route to archive many products in one transaction
+@product_view.route('/products/archive', methods=['POST'])
+@jwt_required()
+def archive_products():
+    current_email = get_jwt_identity()
+    user_id = current_user_id()
+
+    if not user_id:
+        return jsonify({"message":
+            "user not found"
+    }), 400
+
+    app_logger.product_archive_attempt(current_email, request.remote_addr)
+
+    data = request.get_json() or {}
+    try:
+        product_ids = parse_product_ids(data.get("product_ids"))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    owned = owned_product_ids(user_id, product_ids)
+    missing = [product_id for product_id in product_ids if product_id not in owned]
+    if missing:
+        app_logger.product_archive_failure(current_email, reason="unknown products")
+        return jsonify({"message": "Products not found", "product_ids": missing}), 404
+
+    archived_at = datetime.utcnow()
+    result = db.session.execute(
+        db.update(Product)
+        .where(Product.user_id == user_id,
+               Product.id.in_(product_ids),
+               Product.status != 'archived')
+        .values(status='archived', archived_at=archived_at)
+        .execution_options(synchronize_session=False)
+    )
+    bump_data_version(user_id)
+    db.session.commit()
+    invalidate_catalog(user_id)
+    events.publish(user_id, "products", {"action": "archived", "product_ids": product_ids})
+
+    app_logger.product_archive_success(current_email)
+
+    return jsonify({
+        "message": f"{result.rowcount} products archived",
+        "archived": result.rowcount,
+        "already_archived": len(product_ids) - result.rowcount,
+        "archived_at": archived_at.isoformat()
+    }), 200
+
+
 #route to achive a product
 @product_view.route('/product/<int:product_id>/archive', methods=['POST'])
 @jwt_required()
@@ -149,14 +464,14 @@ def archive(product_id):
 
     try:
         current_email = get_jwt_identity()
-        current_user = User.query.filter_by(email=current_email).first()
+        user_id = current_user_id()
 
-        if not current_user:
+        if not user_id:
             return jsonify({"message":
                 "user not found"
         }), 400
 
-        app_logger.product_archive_attempt(current_user, request.remote_addr)
+        app_logger.product_archive_attempt(current_email, request.remote_addr)
 
         #premium = Payment.query.filter_by(
         #user_id=current_user.id, status="success"
@@ -173,8 +488,8 @@ def archive(product_id):
 
 
         product = Product.query.get_or_404(product_id)
-        if product.user_id != current_user.id:
-            app_logger.product_archive_failure(current_user, reason="unauthorized")
+        if product.user_id != user_id:
+            app_logger.product_archive_failure(current_email, reason="unauthorized")
             return jsonify({"message":
             "Unauthorized "
         }), 403
@@ -183,9 +498,12 @@ def archive(product_id):
         product.status = 'archived'
         product.archived_at = datetime.utcnow()
 
-        app_logger.product_archive_success(current_user)
+        app_logger.product_archive_success(current_email)
 
+        bump_data_version(user_id)
         db.session.commit()
+        invalidate_catalog(user_id)
+        events.publish(user_id, "products", {"action": "archived", "product_ids": [product.id]})
         return jsonify({"message":
                         
             "product archived successfully",
@@ -205,32 +523,29 @@ def filter_products():
     try:
         # Identify the user
         current_email = get_jwt_identity()
-        current_user = User.query.filter_by(
-            email=current_email).first()
-        if not current_user:
+        user_id = current_user_id()
+        if not user_id:
             return jsonify({"message":
                  "user not found"}), 400
         
-        app_logger.product_search_attempt(current_user, request.remote_addr)
+        app_logger.product_search_attempt(current_email, request.remote_addr)
 
         # Get search input from query string: /product/filter?name=keysoap
         search_name = request.args.get("name")
         if not search_name:
-            app_logger.product_search_failure(current_user, reason="missing field")
+            app_logger.product_search_failure(current_email, reason="missing field")
             return jsonify({"message":
              "product name is required"}), 400
 
-        # Filter products by name (case-insensitive) + only this user
-        products = Product.query.filter(
-            Product.user_id == current_user.id,
-            Product.product_name.ilike(f"%{search_name}%")
-        ).all()
+        # full-text match on name and supplier, best matches first
+        products = search_products(
+            user_id, search_name, limit=page_size(request.args))
 
         if not products:
             return jsonify({"message":
              "no matching products found"}), 404
         
-        app_logger.product_search_success(current_user)
+        app_logger.product_search_success(current_email)
 
         # Return matching products
         return jsonify([
@@ -238,7 +553,7 @@ def filter_products():
                 "product_name": p.product_name,
                 "selling_price": float(p.selling_price),
                 "initial_stock": p.initial_stock,
-                "expiration_date": p.expiration_date,
+                "expiration_date": p.expiration_date.isoformat() if p.expiration_date else None,
                 "supplier_info": p.supplier_info,
                 "status": p.status
             }
@@ -251,29 +566,168 @@ def filter_products():
                  f"could not filter product: {str(e)}"
                  }), 500
 
+MAX_EXPIRING_DAYS = 365
+
+#route to list products that expire soon
+@product_view.route('/product/expiring', methods=['GET'])
+@jwt_required()
+def expiring_products():
+    from datetime import timedelta
+
+    current_email = get_jwt_identity()
+    user_id = current_user_id()
+
+    if not user_id:
+        return jsonify({"message":
+             "user not found"}), 400
+
+    app_logger.product_status_attempt(current_email, request.remote_addr)
+
+    days = request.args.get('days', 14, type=int)
+    if not 0 <= days <= MAX_EXPIRING_DAYS:
+        return jsonify({"message": f"days must be between 0 and {MAX_EXPIRING_DAYS}"}), 400
+    # ?include_expired=true also lists active products already past their date
+    include_expired = request.args.get('include_expired', '').lower() in ('1', 'true', 'yes')
+
+    today = datetime.utcnow().date()
+    query = (
+        db.session.query(Product.id, Product.product_name,
+                         Product.remaining_stock, Product.expiration_date)
+        .filter(Product.user_id == user_id,
+                Product.status == 'active',
+                Product.expiration_date <= today + timedelta(days=days))
+    )
+    if not include_expired:
+        query = query.filter(Product.expiration_date >= today)
+
+    # range on ix_product_user_expiration, soonest first
+    rows = query.order_by(Product.expiration_date, Product.id).all()
+
+    app_logger.product_status_success(current_email)
+
+    return jsonify({
+        "days": days,
+        "products": [
+            {
+                "id": row.id,
+                "product_name": row.product_name,
+                "remaining_stock": row.remaining_stock,
+                "expiration_date": row.expiration_date.isoformat(),
+                "days_left": (row.expiration_date - today).days
+            }
+            for row in rows
+        ],
+        "total": len(rows)
+    }), 200
+
+
+#typeahead for the point of sale, answered from the in-process prefix index
+@product_view.route('/product/search', methods=['GET'])
+@jwt_required()
+def search():
+    current_email = get_jwt_identity()
+    user_id = current_user_id()
+
+    if not user_id:
+        return jsonify({"message":
+             "user not found"}), 400
+
+    app_logger.product_search_attempt(current_email, request.remote_addr)
+
+    term = request.args.get("q", "")
+    limit = page_size(request.args, default=10)
+
+    product_ids = typeahead(user_id, term, limit)
+    if not product_ids:
+        return jsonify([]), 200
+
+    found = {
+        row.id: row for row in
+        db.session.query(Product.id, Product.product_name,
+                         Product.selling_price, Product.remaining_stock)
+        .filter(Product.user_id == user_id, Product.id.in_(product_ids))
+    }
+
+    app_logger.product_search_success(current_email)
+
+    return jsonify([
+        {
+            "id": row.id,
+            "product_name": row.product_name,
+            "selling_price": float(row.selling_price),
+            "remaining_stock": row.remaining_stock
+        }
+        for row in (found.get(product_id) for product_id in product_ids)
+        if row
+    ]), 200
+
+# what ?fields= may ask for, with how each is written out
+PRODUCT_FIELDS = {
+    "id": lambda p: p.id,
+    "product_name": lambda p: p.product_name,
+    "selling_price": lambda p: float(p.selling_price),
+    "amount_spent": lambda p: float(p.amount_spent),
+    "initial_stock": lambda p: p.initial_stock,
+    "remaining_stock": lambda p: p.remaining_stock,
+    "reorder_point": lambda p: p.reorder_point,
+    "expiration_date": lambda p: p.expiration_date.isoformat() if p.expiration_date else None,
+    "supplier_info": lambda p: p.supplier_info,
+    "status": lambda p: p.status,
+    "archived_at": lambda p: p.archived_at.isoformat() if p.archived_at else None
+}
+
+# non-null columns only, so they can take part in a keyset cursor
+PRODUCT_SORTS = ("id", "product_name", "selling_price", "remaining_stock")
+
+
 #route to get product based on the status         
 @product_view.route('/product', methods=['GET'])
 @jwt_required()
 def get_products():
     try:
-        current_user_email = get_jwt_identity()
-        current_user = User.query.filter_by(email=current_user_email).first()
+        current_email = get_jwt_identity()
+        user_id = current_user_id()
         
-        if not current_user:
+        if not user_id:
             return jsonify({"message": "User not found"}), 404
         
-        app_logger.product_status_attempt(current_user, request.remote_addr)
-        
+        app_logger.product_status_attempt(current_email, request.remote_addr)
+
+        # unchanged since the client's copy: one primary key lookup, no body
+        etag = data_etag(user_id)
+        cached = not_modified(etag)
+        if cached:
+            return cached
+
         # Get status filter from query params, default=active
         status = request.args.get('status', 'active') 
         
-        if status == 'all':
-            products = Product.query.filter_by(user_id=current_user.id).all()
-        else:
-            products = Product.query.filter_by(user_id=current_user.id, status=status).all()
-        
-        products_list = []
-        for product in products:
+        query = Product.query.filter_by(user_id=user_id)
+        if status != 'all':
+            query = query.filter_by(status=status)
+
+        # ?sort=product_name or ?sort=-selling_price, the id breaks ties
+        sort = request.args.get('sort')
+        sort_name = (sort or 'id').lstrip('-')
+        if sort_name not in PRODUCT_SORTS:
+            return jsonify({"message": f"sort must be one of {', '.join(PRODUCT_SORTS)}"}), 400
+        descending = bool(sort) and sort.startswith('-')
+        sort_columns = (getattr(Product, sort_name), Product.id)
+        order = [column.desc() if descending else column.asc() for column in sort_columns]
+
+        # ?fields=id,product_name,remaining_stock only selects those columns
+        fields = [name.strip() for name in request.args.get('fields', '').split(',') if name.strip()]
+        unknown = [name for name in fields if name not in PRODUCT_FIELDS]
+        if unknown:
+            return jsonify({"message": f"unknown fields: {', '.join(unknown)}"}), 400
+        if fields:
+            columns = set(fields) | {sort_name}
+            query = query.options(load_only(*(getattr(Product, name) for name in columns)))
+
+        def product_item(product):
+            if fields:
+                return {name: PRODUCT_FIELDS[name](product) for name in fields}
+
             product_data = {
                 "id": product.id,
                 "product_name": product.product_name,
@@ -281,7 +735,7 @@ def get_products():
                 "amount_spent":float(product.amount_spent),
                 "initial_stock": product.initial_stock,
                 "remaining_stock": product.remaining_stock,
-                "expiration_date": product.expiration_date,
+                "expiration_date": product.expiration_date.isoformat() if product.expiration_date else None,
                 "supplier_info": product.supplier_info,
                 "status": product.status
             }
@@ -289,16 +743,57 @@ def get_products():
             if product.archived_at:
                 #app_logger.product_status_failure(current_user)
                 product_data["archived_at"] = product.archived_at.isoformat()
-            
-            products_list.append(product_data)
-        
-        app_logger.product_status_success(current_user)
-        
-        return jsonify({
+
+            return product_data
+
+        # ?stream=true writes the catalog out as it is read
+        if wants_stream(request.args):
+            app_logger.product_status_success(current_email)
+            response = stream_json_object(
+                query.order_by(*order),
+                product_item,
+                key="products",
+                fields={"status_filter": status},
+                count_key="total"
+            )
+            response.set_etag(etag)
+            return response
+
+        # pages only when asked for, older clients still get the whole list
+        if 'limit' in request.args or 'cursor' in request.args:
+            try:
+                products, next_cursor = keyset_page(
+                    query,
+                    sort_columns,
+                    key=lambda product: (getattr(product, sort_name), product.id),
+                    cursor=request.args.get('cursor'),
+                    limit=page_size(request.args),
+                    descending=descending
+                )
+            except InvalidCursor as e:
+                return jsonify({"message": str(e)}), 400
+
+            body = {"next_cursor": next_cursor}
+            # counted on the first page only
+            if first_page(request.args):
+                body["total"] = query.order_by(None).with_entities(db.func.count(Product.id)).scalar()
+        else:
+            if sort:
+                query = query.order_by(*order)
+            products = query.all()
+            body = {"total": len(products)}
+
+        products_list = [product_item(product) for product in products]
+
+        app_logger.product_status_success(current_email)
+
+        response = jsonify({
             "products": products_list,
-            "total": len(products_list),
-            "status_filter": status
-        }), 200
+            "status_filter": status,
+            **body
+        })
+        response.set_etag(etag)
+        return response, 200
         
     except Exception as e:
         return jsonify({"message":
@@ -1,6 +1,7 @@
 from flask import request, Blueprint, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, jwt_required
 from app.models import User
+from app.identity import get_current_user, user_claims
 from app.db import db, app_logger 
 from werkzeug.security import generate_password_hash, check_password_hash
 import re
@@ -385,7 +386,8 @@ def login():
         #          }), 403
 
         app_logger.log_auth_success(email, existing_user.business_name)
-        access_token = create_access_token(identity=email)
+        access_token = create_access_token(
+            identity=email, additional_claims=user_claims(existing_user))
 
         return jsonify({
             "message": "Logged in successfully",
@@ -403,8 +405,7 @@ def login():
 @security.route('/reset/password', methods=['PUT'])
 @jwt_required()
 def reset():
-    current_email = get_jwt_identity()
-    current_user = User.query.filter_by(email=current_email).first()
+    current_user = get_current_user()
 
     if not current_user:
         return jsonify({"message": "user not found"}), 400
@@ -424,8 +425,7 @@ def user_info():
     if request.method == "OPTIONS":
         return jsonify({"message": "Preflight OK"}), 200
     
-    email = get_jwt_identity()
-    user = User.query.filter_by(email=email).first()
+    user = get_current_user()
     
     if not user:
         return jsonify({"error": "User not found"}), 404
@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import get_jwt_identity, jwt_required
+from flask_jwt_extended import jwt_required
 from app.db import db
-from app.models import User, Services
+from app.models import Services
+from app.identity import get_current_user
+from app.versions import bump_data_version
 
 
 service = Blueprint('service', __name__)
@@ -12,10 +14,7 @@ service = Blueprint('service', __name__)
 def provide():
 
     try:
-        current_email = get_jwt_identity()
-        current_user = User.query.filter_by(
-            email=current_email
-        ).first()
+        current_user = get_current_user()
 
         if not current_user:
             return jsonify({
@@ -48,6 +47,7 @@ def provide():
         )
 
         db.session.add(save_services)
+        bump_data_version(current_user.id)
         db.session.commit()
         return jsonify({
             "message": "services added successfully"
@@ -63,10 +63,7 @@ def provide():
 def see_all():
 
     try:
-        current_email = get_jwt_identity()
-        current_user = User.query.filter_by(
-            email=current_email
-        ).first()
+        current_user = get_current_user()
 
         if not current_user:
             return jsonify({
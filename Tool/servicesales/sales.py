@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import get_jwt_identity, jwt_required
+from flask_jwt_extended import jwt_required
 from app.db import db
-from app.models import User, Servicesales
+from app.models import Servicesales
+from app.identity import get_current_user
+from app.versions import bump_data_version
 
 servicesales = Blueprint('servicesales', __name__)
 
@@ -9,10 +11,7 @@ servicesales = Blueprint('servicesales', __name__)
 @jwt_required()
 def sales():
 
-    current_email = get_jwt_identity()
-    current_user = User.query.filter_by(
-        email=current_email
-    ).first()
+    current_user = get_current_user()
 
     if not current_user:
         return jsonify({
@@ -43,6 +42,7 @@ def sales():
         notes=notes
     )
     db.session.add(save_sales)
+    bump_data_version(current_user.id)
     db.session.commit()
     return jsonify({
         "message": "service sales recorded successfully"
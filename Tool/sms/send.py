@@ -1,11 +1,15 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 import requests
 from app.models import User, db, SMSHistory, SMScontacts
+from app.identity import get_current_user, load_current_user, forget_user
 import os
 from datetime import datetime
 import re
-from app.db import app_logger
+from app.db import app_logger, events
+from app.pagination import page_or_all, InvalidCursor
+from app.streaming import wants_stream, stream_json_object
+from app.versions import bump_data_version
 
 sms = Blueprint("sms", "__name__")
 
@@ -22,8 +26,8 @@ logger = logging.getLogger(__name__)
 @sms.route('/api/sms/send', methods=['POST'])
 @jwt_required()
 def send_sms():
-    current_email = get_jwt_identity()
-    current_user = User.query.filter_by(email=current_email).first()
+    # the balance check needs the row as it is now, not a cached copy
+    current_user = load_current_user()
 
     if not current_user:
         return jsonify({"message": "user not found"}), 400
@@ -204,6 +208,7 @@ def dlr_webhook():
         sms_record.status = new_status
 
         # Deduct balance ONLY if delivered successfully
+        user = None
         if new_status == "delivered":
             user = User.query.get(sms_record.user_id)
             if user:
@@ -215,8 +220,17 @@ def dlr_webhook():
                     new_balance = 0
                 
                 user.sms_balance = new_balance
+                bump_data_version(user.id)
 
         db.session.commit()
+        if user:
+            forget_user(user)
+
+        events.publish(sms_record.user_id, "sms", {
+            "message_id": sms_record.message_id,
+            "status": new_status,
+            "sms_balance": float(user.sms_balance) if user else None
+        })
 
         app_logger.sms_webhook_success("Arkesel called webhook successful")
 
@@ -237,46 +251,70 @@ def dlr_webhook():
 @sms.route('/all/sms', methods=['GET'])
 @jwt_required()
 def all_sms():
-    current_email = get_jwt_identity()
-    current_user = User.query.filter_by(email=current_email).first()
+    # fresh row, the balance moves with every delivery receipt
+    current_user = load_current_user()
 
     if not current_user:
         return jsonify({"message": "user not found"}), 400
     
     app_logger.sms_all_attempt(current_user, request.remote_addr)
 
-    # Get all SMS records for this user
-    get_all_sms_details = SMSHistory.query.filter_by(
-        user_id=current_user.id
-    ).order_by(SMSHistory.created_at.desc()).all()
-
-    # Calculate totals
-    total_sms = len(get_all_sms_details)
-    total_delivered = sum(1 for sms in get_all_sms_details if sms.status == "delivered")
-    total_failed = sum(1 for sms in get_all_sms_details if sms.status == "failed")
-    total_pending = sum(1 for sms in get_all_sms_details if sms.status == "pending")
+    # Calculate totals with one grouped count instead of loading every row
+    counts = dict(
+        db.session.query(SMSHistory.status, db.func.count(SMSHistory.id))
+        .filter(SMSHistory.user_id == current_user.id)
+        .group_by(SMSHistory.status)
+        .all()
+    )
+    totals = {
+        "balance": float(current_user.sms_balance or 0),
+        "total_sms": sum(counts.values()),
+        "total_delivered": counts.get("delivered", 0),
+        "total_failed": counts.get("failed", 0),
+        "total_pending": counts.get("pending", 0)
+    }
 
-    # Format history
-    history = []
-    for row in get_all_sms_details:
-        history.append({
+    def sms_item(row):
+        return {
             "id": row.id,
             "status": row.status,
             "recipient": row.recipient,
             "message": row.message,
             "message_id": row.message_id,
             "created_at": row.created_at.strftime("%Y-%m-%d %H:%M:%S") if row.created_at else None
-        })
+        }
+
+    # ?stream=true sends the whole history as it is read
+    if wants_stream(request.args):
+        app_logger.sms_all_success(current_user)
+        return stream_json_object(
+            SMSHistory.query.filter_by(user_id=current_user.id)
+            .order_by(SMSHistory.created_at.desc(), SMSHistory.id.desc()),
+            sms_item,
+            key="history",
+            fields=totals
+        )
+
+    # SMS records for this user newest first, one page with ?limit=/?cursor=
+    try:
+        get_all_sms_details, next_cursor = page_or_all(
+            SMSHistory.query.filter_by(user_id=current_user.id),
+            (SMSHistory.created_at, SMSHistory.id),
+            key=lambda row: (row.created_at, row.id),
+            args=request.args
+        )
+    except InvalidCursor as e:
+        return jsonify({"message": str(e)}), 400
+
+    # Format history
+    history = [sms_item(row) for row in get_all_sms_details]
 
     app_logger.sms_all_success(current_user)
 
     return jsonify({
-        "balance": float(current_user.sms_balance or 0), 
-        "total_sms": total_sms,
-        "total_delivered": total_delivered,
-        "total_failed": total_failed,
-        "total_pending": total_pending,
-        "history": history
+        **totals,
+        "history": history,
+        "next_cursor": next_cursor
     }), 200
 
 
@@ -284,10 +322,7 @@ def all_sms():
 @jwt_required()
 def contacts():
 
-    current_email = get_jwt_identity()
-    current_user = User.query.filter_by(
-        email=current_email
-    ).first()
+    current_user = get_current_user()
 
     if not current_user:
         return jsonify({
@@ -324,9 +359,7 @@ def contacts():
 @sms.route('/all/contact', methods=['GET'])
 @jwt_required()
 def all_contact():
-    current_email = get_jwt_identity()
-    current_user = User.query.filter_by(
-        email=current_email).first()
+    current_user = get_current_user()
 
     if not current_user:
         return jsonify({
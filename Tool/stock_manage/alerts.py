@@ -0,0 +1,46 @@
+import os
+import threading
+import resend
+from app.db import app_logger
+
+resend.api_key = os.getenv('RESEND_API_KEY')
+
+
+def notify_low_stock(email, crossings):
+    """Email the owner about products that just reached their reorder point.
+
+    Called after the sale commits with the output of low_stock_crossings(),
+    the email goes out on a background thread so the sale isn't held up.
+    """
+    if not crossings or os.getenv("LOW_STOCK_ALERTS", "1") == "0":
+        return
+
+    thread = threading.Thread(target=send_low_stock_email, args=(email, crossings))
+    thread.daemon = True
+    thread.start()
+
+
+def send_low_stock_email(email, crossings):
+    rows = "".join(
+        f"<li><strong>{item['product_name']}</strong>: {item['remaining_stock']} left "
+        f"(reorder point {item['reorder_point']})</li>"
+        for item in crossings
+    )
+    subject = (
+        f"Low stock: {crossings[0]['product_name']}" if len(crossings) == 1
+        else f"Low stock: {len(crossings)} products"
+    )
+
+    try:
+        resend.Emails.send({
+            "from": "Nkwabiz <info@nkwabiz.com>",
+            "to": email,
+            "subject": subject,
+            "html": f"""
+                <h2>Time to reorder</h2>
+                <p>These products just reached their reorder point:</p>
+                <ul>{rows}</ul>
+            """
+        })
+    except Exception as e:
+        app_logger.log_error("Failed to send low stock alert", exception=e, context=email)
@@ -0,0 +1,68 @@
+from datetime import timedelta
+import numpy as np
+
+
+GRANULARITIES = ("day", "week", "month")
+
+# span used when the caller gives no start date
+DEFAULT_SPAN = {
+    "day": timedelta(days=30),
+    "week": timedelta(weeks=12),
+    "month": timedelta(days=365)
+}
+
+MAX_RANGE_DAYS = 3660
+
+
+def period_starts(days, granularity):
+    """First day of the day/week/month each datetime64[D] value falls in."""
+    if granularity == "month":
+        return days.astype("datetime64[M]").astype("datetime64[D]")
+    if granularity == "week":
+        # day 0 of the epoch is a Thursday, weeks start on Monday
+        return days - (days.astype("int64") + 3) % 7
+    return days
+
+
+def align_start(start, granularity):
+    """Move a start date back to the first day of its period so it isn't partial."""
+    return period_starts(np.datetime64(start, "D"), granularity).astype(object)
+
+
+def sales_timeseries(rows, start, end, granularity):
+    """Gap-filled series from (day, qty, revenue, profit) rows for [start, end).
+
+    Every period in the range gets an entry, with zeros where nothing was
+    sold, plus running totals from the start of the range.
+    """
+    calendar = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D"))
+    periods = np.unique(period_starts(calendar, granularity))
+
+    totals = np.zeros((len(periods), 3))
+    if rows:
+        days = np.array([row[0] for row in rows], dtype="datetime64[D]")
+        values = np.array([row[1:] for row in rows], dtype=float)
+        slots = np.searchsorted(periods, period_starts(days, granularity))
+        np.add.at(totals, slots, values)
+
+    running = totals.cumsum(axis=0)
+
+    series = [
+        {
+            "period": str(period),
+            "quantity": int(total[0]),
+            "revenue": round(float(total[1]), 2),
+            "profit": round(float(total[2]), 2),
+            "cumulative_quantity": int(cumulative[0]),
+            "cumulative_revenue": round(float(cumulative[1]), 2),
+            "cumulative_profit": round(float(cumulative[2]), 2)
+        }
+        for period, total, cumulative in zip(periods, totals, running)
+    ]
+
+    overall = running[-1] if len(running) else np.zeros(3)
+    return series, {
+        "quantity": int(overall[0]),
+        "revenue": round(float(overall[1]), 2),
+        "profit": round(float(overall[2]), 2)
+    }
@@ -0,0 +1,55 @@
+import numpy as np
+
+
+# defaults of `flask forecast-reorder`
+WINDOW_DAYS = 56
+SMOOTHING = 0.3
+LEAD_TIME_DAYS = 7
+REVIEW_DAYS = 14
+SERVICE_Z = 1.65
+
+
+def demand_matrix(rows, product_ids, start, days):
+    """(product, day) matrix of units sold from (product_id, day, qty) rows."""
+    matrix = np.zeros((len(product_ids), days))
+    if rows:
+        position = {product_id: i for i, product_id in enumerate(product_ids)}
+        data = np.array(
+            [(position[product_id], (day - start).days, qty) for product_id, day, qty in rows],
+            dtype=float
+        )
+        np.add.at(matrix, (data[:, 0].astype(int), data[:, 1].astype(int)), data[:, 2])
+    return matrix
+
+
+def forecast_reorder(demand, remaining_stock, alpha=SMOOTHING, lead_time=LEAD_TIME_DAYS,
+                     review=REVIEW_DAYS, z=SERVICE_Z):
+    """Reorder suggestions for every row of a (product, day) demand matrix at once.
+
+    The forecast is simple exponential smoothing of daily demand, seeded
+    with the window's mean. The reorder point covers the lead time plus
+    safety stock for the demand's day-to-day spread. The order quantity
+    then tops stock up to cover the review period after that.
+    """
+    days = demand.shape[1]
+    rate = demand.mean(axis=1)
+
+    # level after smoothing day by day, written as one weighted sum
+    weights = alpha * (1 - alpha) ** np.arange(days - 1, -1, -1)
+    forecast = demand @ weights + (1 - alpha) ** days * rate
+
+    safety = z * demand.std(axis=1) * np.sqrt(lead_time)
+    reorder_point = np.ceil(forecast * lead_time + safety)
+    order_quantity = np.maximum(
+        np.ceil(forecast * (lead_time + review) + safety - remaining_stock), 0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cover = np.where(forecast > 0, remaining_stock / forecast, np.nan)
+
+    return {
+        "demand_rate": rate,
+        "forecast": forecast,
+        "days_of_cover": cover,
+        "reorder_point": reorder_point.astype(int),
+        "order_quantity": order_quantity.astype(int)
+    }
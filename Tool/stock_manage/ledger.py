@@ -0,0 +1,116 @@
+from datetime import datetime
+from app.db import db
+from app.models import Product, SalesHistory, DailySalesRollup
+from app.upsert import upsert
+
+
+# MySQL: deadlock found, lock wait timeout exceeded
+LOCK_CONFLICT_CODES = (1213, 1205)
+
+
+def is_lock_conflict(error):
+    """True when an OperationalError is a deadlock or lock wait timeout, safe to retry."""
+    args = getattr(error.orig, "args", ())
+    return bool(args) and args[0] in LOCK_CONFLICT_CODES
+
+
+def deduct_stock(product_id, quantity):
+    """Take quantity off a product's stock in one conditional UPDATE.
+
+    Returns False when there isn't enough stock left. The row lock taken
+    by the UPDATE is held until the caller commits, so concurrent
+    checkouts can never oversell.
+    """
+    result = db.session.execute(
+        db.update(Product)
+        .where(Product.id == product_id, Product.remaining_stock >= quantity)
+        .values(remaining_stock=Product.remaining_stock - quantity)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def build_sale(product, quantity, created_at=None):
+    return SalesHistory(
+        product_id=product.id,
+        quantity=quantity,
+        unit_price=float(product.selling_price),
+        total_price=float(product.selling_price * quantity),
+        profit=float(product.selling_price - product.amount_spent) * quantity,
+        created_at=created_at or datetime.utcnow()
+    )
+
+
+def rollup_sales(user_id, sales):
+    """Fold new sales into DailySalesRollup in the caller's transaction."""
+    totals = {}
+    for sale in sales:
+        key = (sale.created_at.date(), sale.product_id)
+        row = totals.setdefault(key, {
+            "user_id": user_id,
+            "day": key[0],
+            "product_id": key[1],
+            "qty": 0,
+            "revenue": 0,
+            "profit": 0
+        })
+        row["qty"] += sale.quantity
+        row["revenue"] += sale.total_price
+        row["profit"] += sale.profit
+
+    # sorted so concurrent baskets lock rollup rows in the same order
+    upsert(
+        DailySalesRollup,
+        [totals[key] for key in sorted(totals)],
+        keys=("user_id", "day", "product_id"),
+        increment=("qty", "revenue", "profit")
+    )
+
+
+def low_stock_crossings(quantities):
+    """Products these sales took from above their reorder point to at or below it.
+
+    `quantities` maps product id -> units sold in this transaction. Call it
+    before committing, while the deducting UPDATEs still hold the row
+    locks, so the stock levels read here are exactly this sale's result.
+    """
+    if not quantities:
+        return []
+
+    rows = (
+        db.session.query(
+            Product.id, Product.product_name,
+            Product.remaining_stock, Product.reorder_point)
+        .filter(
+            Product.id.in_(quantities),
+            Product.remaining_stock <= Product.reorder_point)
+        .all()
+    )
+    return [
+        {
+            "product_id": row.id,
+            "product_name": row.product_name,
+            "remaining_stock": row.remaining_stock,
+            "reorder_point": row.reorder_point
+        }
+        for row in rows
+        # was still above the reorder point before this sale
+        if row.remaining_stock + quantities[row.id] > row.reorder_point
+    ]
+
+
+def record_sale(product, quantity):
+    """Deduct stock and add the SalesHistory row in the caller's transaction.
+
+    Returns the new SalesHistory, or None when stock ran out.
+    """
+    if not deduct_stock(product.id, quantity):
+        return None
+
+    sale = build_sale(product, quantity)
+    db.session.add(sale)
+    rollup_sales(product.user_id, [sale])
+
+    # the UPDATE bypassed the ORM, reload the stock level on next access
+    db.session.expire(product, ["remaining_stock"])
+    return sale
@@ -1,204 +1,465 @@
 from flask import Blueprint, request, jsonify
-from app.models import User, Product, SalesHistory, Payment
-from app.db import db, app_logger
+from app.models import Product, SalesHistory, Payment, DailySalesRollup, ReorderSuggestion
+from app.identity import current_user_id
+from product_view.catalog import get_tenant_product, get_tenant_products
+from stock_manage.ledger import (
+    record_sale, deduct_stock, build_sale, rollup_sales, low_stock_crossings, is_lock_conflict)
+from stock_manage.alerts import notify_low_stock
+from stock_manage.analytics import (
+    GRANULARITIES, DEFAULT_SPAN, MAX_RANGE_DAYS, align_start, sales_timeseries)
+from app.db import db, app_logger, cache, events
+from app.pagination import page_or_all, paging_requested, first_page, list_response, InvalidCursor
+from app.periods import month_range, period_from_args, in_period, InvalidPeriod
+from app.streaming import wants_stream, stream_json_array
+from app.versions import bump_data_version, data_version
 from flask_jwt_extended import get_jwt_identity, jwt_required
 from datetime import datetime
+from sqlalchemy.exc import OperationalError
 
 stock_manage = Blueprint("stock_manage", "__name__")
 
+
+def lock_conflict(error, current_email):
+    """Roll back a sale that lost a deadlock or lock wait and ask the client to retry.
+
+    Any other OperationalError is re-raised.
+    """
+    db.session.rollback()
+    if not is_lock_conflict(error):
+        raise error
+    app_logger.sales_entering_failure(current_email, reason="lock conflict")
+    response = jsonify({"error": "Stock is busy, nothing was sold. Please retry."})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+
 #route to enter stock to deduct
 @stock_manage.route('/stocks', methods=['POST'])
 @jwt_required()
 def stock():
 
     current_email = get_jwt_identity()
-    current_user = User.query.filter_by(
-        email=current_email).first()
+    user_id = current_user_id()
 
-    if not current_user:
+    if not user_id:
         return jsonify({"message":
                 "user not found"
         }), 400
 
     data = request.get_json()
-    quantity = int(data.get("quantity"))
-    product_name = data.get("product_name")
+    try:
+        quantity = int(data.get("quantity"))
+    except (TypeError, ValueError):
+        return jsonify({"error": "quantity must be a whole number"}), 400
 
-    app_logger.sales_entering_attempt(current_user, request.remote_addr)
+    if quantity <= 0:
+        return jsonify({"error": "quantity must be greater than 0"}), 400
 
+    product_id = data.get("product_id")
+    product_name = data.get("product_name")
 
-    product = Product.query.filter_by(
-        product_name=product_name).first()
-    
-    
-    if product.user_id != current_user.id:
-            return jsonify({"message":
-            "Unauthorized "
-        }), 403
+    app_logger.sales_entering_attempt(current_email, request.remote_addr)
+
+    # only ever looks inside this tenant's catalog
+    product = get_tenant_product(
+        user_id, product_id=product_id, product_name=product_name)
 
     if not product:
-        app_logger.sales_entering_failure(current_user, reason="product not found")
+        app_logger.sales_entering_failure(current_email, reason="product not found")
         return jsonify({"error":
              "Product not found"}), 404
 
-    if product.remaining_stock < quantity:
-        return jsonify({"error":
-                 "Not enough stock"}), 400
-
-
-    sales = SalesHistory(
-        product_id=product.id,
-        quantity=quantity, 
-        unit_price=float(product.selling_price),
-        total_price=float(product.selling_price*quantity),
-        profit=float(product.selling_price - product.amount_spent)*quantity
-#return the sum of all sales money with the latest date
-    )
-
-    # deduct
-    product.remaining_stock -= quantity
+    # deduct and record in one transaction, the UPDATE only
+    # succeeds while enough stock is left
+    try:
+        sale = record_sale(product, quantity)
+        if not sale:
+            db.session.rollback()
+            app_logger.sales_entering_failure(current_email, reason="not enough stock")
+            return jsonify({"error":
+                     "Not enough stock"}), 400
+
+        crossings = low_stock_crossings({product.id: quantity})
+        bump_data_version(user_id)
+        db.session.commit()
+    except OperationalError as e:
+        return lock_conflict(e, current_email)
+
+    notify_low_stock(current_email, crossings)
+    publish_sales(user_id, [{
+        "product_id": product.id,
+        "product_name": product.product_name,
+        "quantity": quantity,
+        "remaining_stock": product.remaining_stock
+    }], crossings)
 
     app_logger.sales_entering_success(current_email)
 
-    db.session.add(sales)
-    db.session.commit()
-
     return {
         "message": f"Purchase successful, {quantity} deducted",
         "remaining_stock": product.remaining_stock
     }
 
 
+def publish_sales(user_id, items, crossings):
+    # compact deltas for open dashboards, sent once the sale is committed
+    events.publish(user_id, "sale", {"items": items})
+    if crossings:
+        events.publish(user_id, "low_stock", {"items": crossings})
+
+
+MAX_BASKET_LINES = 200
+
+def _as_id(value):
+    # ids come as JSON numbers or numeric strings, anything else is None
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+#route to enter a whole basket in one transaction
+@stock_manage.route('/stocks/batch', methods=['POST'])
+@jwt_required()
+def stock_batch():
+
+    current_email = get_jwt_identity()
+    user_id = current_user_id()
+
+    if not user_id:
+        return jsonify({"message":
+                "user not found"
+        }), 400
+
+    data = request.get_json() or {}
+    items = data.get("items")
+    # by default good lines are sold even if others fail
+    all_or_nothing = bool(data.get("all_or_nothing", False))
+
+    if not items or not isinstance(items, list):
+        return jsonify({"error": "items must be a non-empty list"}), 400
+
+    if len(items) > MAX_BASKET_LINES:
+        return jsonify({"error": f"at most {MAX_BASKET_LINES} items per basket"}), 400
+
+    app_logger.sales_entering_attempt(current_email, request.remote_addr)
+
+    product_ids = [_as_id(item.get("product_id")) for item in items
+                   if isinstance(item, dict) and item.get("product_id") is not None]
+    product_ids = [product_id for product_id in product_ids if product_id is not None]
+    product_names = [item.get("product_name") for item in items
+                     if isinstance(item, dict) and item.get("product_id") is None
+                     and item.get("product_name")]
+
+    # one IN query for the whole basket
+    by_id, by_name = get_tenant_products(user_id, product_ids, product_names)
+
+    results = []
+    lines = []
+    sales = []
+    now = datetime.utcnow()
+
+    for line, item in enumerate(items):
+        result = {"line": line}
+        results.append(result)
+
+        if not isinstance(item, dict):
+            result["error"] = "each item must be an object"
+            continue
+
+        try:
+            quantity = int(item.get("quantity"))
+        except (TypeError, ValueError):
+            result["error"] = "quantity must be a whole number"
+            continue
+
+        if item.get("product_id") is not None:
+            product_id = _as_id(item.get("product_id"))
+            if product_id is None:
+                result["error"] = "product_id must be a whole number"
+                continue
+            product = by_id.get(product_id)
+        else:
+            product = by_name.get(item.get("product_name"))
+
+        if not product:
+            result["error"] = "Product not found"
+            continue
+
+        result.update({
+            "product_id": product.id,
+            "product_name": product.product_name,
+            "quantity": quantity
+        })
+
+        if quantity <= 0:
+            result["error"] = "quantity must be greater than 0"
+            continue
+
+        lines.append((product, quantity, result))
+
+    # lock product rows in id order, like rollup_sales does, so two
+    # baskets holding the same products can't deadlock each other
+    lines.sort(key=lambda line: line[0].id)
+    try:
+        for product, quantity, result in lines:
+            if not deduct_stock(product.id, quantity):
+                result["error"] = "Not enough stock"
+                continue
+
+            sale = build_sale(product, quantity, created_at=now)
+            sales.append(sale)
+            result["total_price"] = float(sale.total_price)
+    except OperationalError as e:
+        return lock_conflict(e, current_email)
+
+    failed = [result for result in results if "error" in result]
+
+    if not sales or (failed and all_or_nothing):
+        db.session.rollback()
+        app_logger.sales_entering_failure(current_email, reason="basket rejected")
+        for result in results:
+            result.pop("total_price", None)
+            result.setdefault("error", "basket rejected")
+        return jsonify({
+            "message": "No sales recorded",
+            "sold": 0,
+            "failed": len(results),
+            "items": results
+        }), 400
+
+    try:
+        db.session.add_all(sales)
+        rollup_sales(user_id, sales)
+
+        quantities = {}
+        for sale in sales:
+            quantities[sale.product_id] = quantities.get(sale.product_id, 0) + sale.quantity
+        crossings = low_stock_crossings(quantities)
+
+        bump_data_version(user_id)
+        db.session.commit()
+    except OperationalError as e:
+        return lock_conflict(e, current_email)
+
+    notify_low_stock(current_email, crossings)
+
+    # read the new stock levels back in one query
+    sold_ids = {sale.product_id for sale in sales}
+    remaining = dict(
+        db.session.query(Product.id, Product.remaining_stock)
+        .filter(Product.id.in_(sold_ids))
+        .all()
+    )
+    for result in results:
+        if "error" not in result:
+            result["remaining_stock"] = remaining.get(result["product_id"])
+
+    publish_sales(user_id, [
+        {name: result[name] for name in
+         ("product_id", "product_name", "quantity", "remaining_stock")}
+        for result in results if "error" not in result
+    ], crossings)
+
+    app_logger.sales_entering_success(current_email)
+
+    return jsonify({
+        "message": f"{len(sales)} of {len(results)} items sold",
+        "sold": len(sales),
+        "failed": len(failed),
+        "items": results
+    }), 200
+
+
 @stock_manage.route('/stock/alert', methods=['POST', 'GET'])
 @jwt_required()
 def stock_alert():
 
     current_email = get_jwt_identity()
-    current_user = User.query.filter_by(
-        email=current_email).first()
+    user_id = current_user_id()
 
-    if not current_user:
+    if not user_id:
         return jsonify({"message":
             "user not found"
         }), 400
     
-    app_logger.low_stock_alert_attempt(current_user, request.remote_addr)
+    app_logger.low_stock_alert_attempt(current_email, request.remote_addr)
    
-    products = Product.query.filter_by(
-         user_id=current_user.id).all()
-    
+    # only the low rows leave the database, read off ix_product_user_stock
+    products = (
+        db.session.query(Product.product_name, Product.remaining_stock)
+        .filter(
+            Product.user_id == user_id,
+            Product.remaining_stock <= Product.reorder_point)
+        .order_by(Product.remaining_stock)
+        .all()
+    )
 
-    notification = []
-    for pro in products:
-        if pro.remaining_stock <= pro.reorder_point:
-         app_logger.low_stock_alert_failure(current_user, reason="failed")
-         notification.append({
-              "product_name":pro.product_name,
-              "remaining_stock":pro.remaining_stock,
-              "message":
+    notification = [
+        {
+            "product_name": pro.product_name,
+            "remaining_stock": pro.remaining_stock,
+            "message":
                 f"Low stock! Reoder {pro.product_name}"
-         })
+        }
+        for pro in products
+    ]
     app_logger.low_stock_alert_success(current_email)
     return jsonify({"alert": notification}),200
 
 
 
+def tenant_sales(user_id, *entities):
+    return (
+        db.session.query(*entities)
+        .select_from(SalesHistory)
+        .join(Product, Product.id == SalesHistory.product_id)
+        .filter(Product.user_id == user_id)
+    )
+
+
 #route to view sales analytics and history
 @stock_manage.route('/stocks/history', methods=['GET'])
 @jwt_required()
 def history():
     current_email = get_jwt_identity()
-    current_user = User.query.filter_by(
-        email=current_email).first()
+    user_id = current_user_id()
 
-    if not current_user:
+    if not user_id:
         return jsonify({"message": "User not found"}), 400
 
-    app_logger.sales_analytics_attempt(current_user, request.remote_addr)
-   
-    # Fetch all sales history joined with Product
-    get_history = (
-        db.session.query(SalesHistory, Product)
-        .join(Product)
-        .filter(Product.user_id == current_user.id)
-        .all()
+    app_logger.sales_analytics_attempt(current_email, request.remote_addr)
+
+    version = data_version(user_id)
+    cached = cache.response(user_id, version, "history")
+    if cached is not None:
+        app_logger.sales_analytics_success(current_email)
+        return cached, 200
+
+    # totals for the most recent sales day in one aggregate over the rollup
+    latest_day = (
+        db.session.query(db.func.max(DailySalesRollup.day))
+        .filter(DailySalesRollup.user_id == user_id)
+        .scalar_subquery()
+    )
+    summary = (
+        db.session.query(
+            DailySalesRollup.day,
+            db.func.sum(DailySalesRollup.revenue).label("total_sales"),
+            db.func.sum(DailySalesRollup.profit).label("total_profit")
+        )
+        .filter(DailySalesRollup.user_id == user_id,
+                DailySalesRollup.day == latest_day)
+        .group_by(DailySalesRollup.day)
+        .first()
     )
 
-    if not get_history:
-        app_logger.sales_analytics_failure(current_user, reason="failed")
+    if not summary:
+        app_logger.sales_analytics_failure(current_email, reason="failed")
         return jsonify({"message":
                  "No sales history found"}), 404
 
-    result = []
-    for sale, product in get_history:
-        result.append({
-            "sale_id": sale.id,
-            "product_name": product.product_name,
-            "quantity": float(sale.quantity),
-            "unit_price": float(sale.unit_price),
-            "total_price": float(sale.total_price),
-            "profit": float(sale.profit),
-            "date": sale.created_at
-        })
-
-    # Get total profit and total sales for the most recent date
-    sale_dates = [sale.created_at.date() for sale, _ in get_history]
-    most_recent_date = max(sale_dates)
-
-    # Filter sales for that date
-    sales_for_recent_date = [
-        sale for sale, _ in get_history
-        if sale.created_at.date() == most_recent_date
-    ]
+    response = {
+        "summary": {
+            "recent_date": summary.day.isoformat(),
+            "total_sales_for_recent_date": float(summary.total_sales),
+            "total_profit_for_recent_date": float(summary.total_profit)
+        }
+    }
 
-    # Compute totals
-    total_profit_today = sum(sale.profit for sale in sales_for_recent_date)
-    total_sales_today = sum(sale.total_price for sale in sales_for_recent_date)
+    # the detailed list is optional and pages with ?limit=/?cursor=,
+    # ?history=false skips it
+    if request.args.get("history", "true").lower() != "false":
+        query = tenant_sales(user_id, SalesHistory, Product.product_name)
+        try:
+            get_history, next_cursor = page_or_all(
+                query,
+                (SalesHistory.created_at, SalesHistory.id),
+                key=lambda row: (row[0].created_at, row[0].id),
+                args=request.args
+            )
+        except InvalidCursor as e:
+            return jsonify({"message": str(e)}), 400
+
+        response["sales_history"] = [
+            {
+                "sale_id": sale.id,
+                "product_name": product_name,
+                "quantity": float(sale.quantity),
+                "unit_price": float(sale.unit_price),
+                "total_price": float(sale.total_price),
+                "profit": float(sale.profit),
+                "date": sale.created_at
+            }
+            for sale, product_name in get_history
+        ]
+        response["next_cursor"] = next_cursor
+        # counted on the first page only, the whole list already is the total
+        if first_page(request.args):
+            response["total"] = tenant_sales(user_id, db.func.count(SalesHistory.id)).scalar()
+        elif not paging_requested(request.args):
+            response["total"] = len(get_history)
 
     app_logger.sales_analytics_success(current_email)
-    return jsonify({
-        "sales_history": result,
-        "summary": {
-            "recent_date": most_recent_date.isoformat(),
-            "total_sales_for_recent_date": float(total_sales_today),
-            "total_profit_for_recent_date": float(total_profit_today)
-        }
-    }), 200
+    return cache.save_response(user_id, version, "history", jsonify(response)), 200
 
 #route to get product sold
 @stock_manage.route('/product/sold', methods=['GET'])
 @jwt_required()
 def sold():
     current_email = get_jwt_identity()
-    current_user = User.query.filter_by(email=current_email).first()
+    user_id = current_user_id()
 
-    if not current_user:
+    if not user_id:
         return jsonify({"message": "user not found"}), 400
 
 
-    app_logger.all_sales_attempt(current_user, request.remote_addr)
+    app_logger.all_sales_attempt(current_email, request.remote_addr)
 
-    get_history = (
-        db.session.query(SalesHistory, Product)
-        .join(Product)
-        .filter(Product.user_id == current_user.id)
-        .order_by(SalesHistory.created_at.desc()) 
-        .all()
-    )
-
-    results = []
-    for sale, product in get_history:
-        app_logger.all_sales_failure(current_user, reason="failed")
-        results.append({
-            "product_name": product.product_name,
+    def sale_item(row):
+        sale, product_name = row
+        return {
+            "product_name": product_name,
             "quantity": sale.quantity,
             "total_price": float(sale.total_price),
             "date": sale.created_at
-        })
+        }
+
+    # ?stream=true sends the whole history as it is read
+    if wants_stream(request.args):
+        app_logger.all_sales_success(current_email)
+        return stream_json_array(
+            tenant_sales(user_id, SalesHistory, Product.product_name)
+            .order_by(SalesHistory.created_at.desc(), SalesHistory.id.desc()),
+            sale_item
+        )
+
+    # newest first; with ?limit= or ?cursor= one page at a time, the paging
+    # details go in the headers so the body stays a plain list
+    try:
+        get_history, next_cursor = page_or_all(
+            tenant_sales(user_id, SalesHistory, Product.product_name),
+            (SalesHistory.created_at, SalesHistory.id),
+            key=lambda row: (row[0].created_at, row[0].id),
+            args=request.args
+        )
+    except InvalidCursor as e:
+        app_logger.all_sales_failure(current_email, reason="invalid cursor")
+        return jsonify({"message": str(e)}), 400
+
+    results = [sale_item(row) for row in get_history]
+
+    total = None
+    if first_page(request.args):
+        total = tenant_sales(user_id, db.func.count(SalesHistory.id)).scalar()
 
     app_logger.all_sales_success(current_email)
     
-    return jsonify(results), 200
+    return list_response(results, next_cursor, total), 200
 
 
 
@@ -209,43 +470,54 @@ def monthly_sales():
     from datetime import datetime
 
     current_email = get_jwt_identity()
-    current_user = User.query.filter_by(email=current_email).first()
+    user_id = current_user_id()
 
-    if not current_user:
+    if not user_id:
         return jsonify({"message": "User not found"}), 400
 
-    app_logger.sales_filter_attempt(current_user, request.remote_addr)
+    app_logger.sales_filter_attempt(current_email, request.remote_addr)
+
+    version = data_version(user_id)
+    cached = cache.response(user_id, version, "monthly_sales")
+    if cached is not None:
+        app_logger.sales_filter_success(current_email)
+        return cached, 200
 
     year = request.args.get('year', type=int)
     month = request.args.get('month', type=int)
+    product_id = request.args.get('product_id', type=int)
 
     # Using current year/month if not provided
     now = datetime.utcnow()
     year = year or now.year
     month = month or now.month
 
+    try:
+        start, end = month_range(year, month)
+    except InvalidPeriod as e:
+        return jsonify({"message": str(e)}), 400
 
+    # read the daily rollup, one row per product per day instead of per sale
     query = (
         db.session.query(
-            db.extract('year', SalesHistory.created_at).label('year'),
-            db.extract('month', SalesHistory.created_at).label('month'),
-            db.func.sum(SalesHistory.total_price).label('total_sales'),
-            db.func.sum(SalesHistory.profit).label('total_profit')
+            db.extract('year', DailySalesRollup.day).label('year'),
+            db.extract('month', DailySalesRollup.day).label('month'),
+            db.func.sum(DailySalesRollup.revenue).label('total_sales'),
+            db.func.sum(DailySalesRollup.profit).label('total_profit')
         )
-        .join(Product, Product.id == SalesHistory.product_id)
-        .filter(Product.user_id == current_user.id)
-        .filter(db.extract('year', SalesHistory.created_at) == year)
+        .filter(DailySalesRollup.user_id == user_id)
+        # a day range rather than extract() so the primary key can be range-scanned
+        .filter(*in_period(DailySalesRollup.day, start, end))
     )
 
-    # month filter
-    if month:
-        query = query.filter(db.extract('month', SalesHistory.created_at) == month)
+    if product_id:
+        query = query.filter(DailySalesRollup.product_id == product_id)
 
     query = query.group_by('year', 'month').order_by(db.desc('year'), db.desc('month'))
     results = query.all()
 
     if not results:
-        app_logger.sales_filter_failure(current_user, reason="failed")
+        app_logger.sales_filter_failure(current_email, reason="failed")
         return jsonify({
             "message": f"No sales data found for {year}-{month:02d}"
         }), 404
@@ -262,11 +534,131 @@ def monthly_sales():
 
     app_logger.sales_filter_success(current_email)
 
-    return jsonify({
-        "user": current_user.email,
+    return cache.save_response(user_id, version, "monthly_sales", jsonify({
+        "user": current_email,
         "filter_used": {
             "year": year,
-            "month": month
+            "month": month,
+            "product_id": product_id
         },
         "monthly_sales_summary": monthly_summary
+    })), 200
+
+
+#route to chart sales over time
+@stock_manage.route('/analytics/timeseries', methods=['GET'])
+@jwt_required()
+def sales_timeseries_view():
+    from datetime import timedelta
+
+    current_email = get_jwt_identity()
+    user_id = current_user_id()
+
+    if not user_id:
+        return jsonify({"message": "user not found"}), 400
+
+    app_logger.sales_analytics_attempt(current_email, request.remote_addr)
+
+    granularity = request.args.get('granularity', 'day')
+    product_id = request.args.get('product_id', type=int)
+
+    if granularity not in GRANULARITIES:
+        return jsonify({"message": f"granularity must be one of {', '.join(GRANULARITIES)}"}), 400
+
+    try:
+        start, end = period_from_args(request.args)
+    except InvalidPeriod as e:
+        return jsonify({"message": str(e)}), 400
+
+    # default to the recent past, ending today
+    end = end or datetime.utcnow().date() + timedelta(days=1)
+    start = align_start(start or end - DEFAULT_SPAN[granularity], granularity)
+
+    if (end - start).days > MAX_RANGE_DAYS:
+        return jsonify({"message": f"range can cover at most {MAX_RANGE_DAYS} days"}), 400
+
+    # one grouped query over the daily rollup, the gaps are filled in afterwards
+    query = (
+        db.session.query(
+            DailySalesRollup.day,
+            db.func.sum(DailySalesRollup.qty),
+            db.func.sum(DailySalesRollup.revenue),
+            db.func.sum(DailySalesRollup.profit)
+        )
+        .filter(DailySalesRollup.user_id == user_id)
+        .filter(*in_period(DailySalesRollup.day, start, end))
+    )
+    if product_id:
+        query = query.filter(DailySalesRollup.product_id == product_id)
+
+    rows = query.group_by(DailySalesRollup.day).all()
+    series, totals = sales_timeseries(rows, start, end, granularity)
+
+    app_logger.sales_analytics_success(current_email)
+
+    return jsonify({
+        "user": current_email,
+        "granularity": granularity,
+        "from": start.isoformat(),
+        "to": (end - timedelta(days=1)).isoformat(),
+        "product_id": product_id,
+        "series": series,
+        "totals": totals
     }), 200
+
+
+#route to read the nightly reorder suggestions
+@stock_manage.route('/reorder/suggestions', methods=['GET'])
+@jwt_required()
+def reorder_suggestions():
+    current_email = get_jwt_identity()
+    user_id = current_user_id()
+
+    if not user_id:
+        return jsonify({"message": "user not found"}), 400
+
+    app_logger.low_stock_alert_attempt(current_email, request.remote_addr)
+
+    # ?all=true includes products that don't need reordering yet
+    show_all = request.args.get('all', '').lower() in ('1', 'true', 'yes')
+
+    query = (
+        db.session.query(ReorderSuggestion, Product.product_name,
+                         Product.remaining_stock, Product.reorder_point)
+        .join(Product, Product.id == ReorderSuggestion.product_id)
+        .filter(ReorderSuggestion.user_id == user_id, Product.status == 'active')
+    )
+    if not show_all:
+        query = query.filter(ReorderSuggestion.order_quantity > 0)
+
+    rows = query.order_by(
+        ReorderSuggestion.days_of_cover.is_(None),
+        ReorderSuggestion.days_of_cover,
+        ReorderSuggestion.product_id
+    ).all()
+
+    suggestions = [
+        {
+            "product_id": suggestion.product_id,
+            "product_name": product_name,
+            "remaining_stock": remaining_stock,
+            "reorder_point": reorder_point,
+            "suggested_reorder_point": suggestion.reorder_point,
+            "suggested_order_quantity": suggestion.order_quantity,
+            "daily_demand": float(suggestion.demand_rate),
+            "forecast_daily_demand": float(suggestion.forecast),
+            "days_of_cover": float(suggestion.days_of_cover)
+                if suggestion.days_of_cover is not None else None,
+            "computed_at": suggestion.computed_at.isoformat() if suggestion.computed_at else None
+        }
+        for suggestion, product_name, remaining_stock, reorder_point in rows
+    ]
+
+    app_logger.low_stock_alert_success(current_email)
+
+    return jsonify({
+        "user": current_email,
+        "suggestions": suggestions,
+        "total": len(suggestions)
+    }), 200
+